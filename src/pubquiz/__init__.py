@@ -2,4 +2,18 @@
 
 """Python utilities for writing pub quizzes."""
 
-from .quiz import Quiz  # noqa: F401
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .quiz import Quiz  # noqa: F401
+
+__all__ = ["Quiz"]
+
+
+def __getattr__(name):
+    # Import the quiz machinery (and yaml) on first use, so that ``pubquiz --version`` and friends start quickly
+    if name == "Quiz":
+        from .quiz import Quiz
+
+        return Quiz
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,408 @@
+"""Module for the question bank: an indexed SQLite store of questions from which to assemble new quizzes.
+
+Questions are imported from quiz yaml files. On top of the usual fields, the questions in these files may have
+``tags``, a ``category`` and a ``difficulty``. The bank records when every question was last used, so that
+quizzes can be assembled from questions that have not been asked before, e.g.
+
+.. code-block:: python
+
+    bank = QuestionBank()
+    bank.import_yaml("old_quiz.yaml")
+    music = bank.round("Music", n=10, category="music", pictures=True, unused=True)
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from pubquiz import dedup
+from pubquiz.loader import load_yaml
+from pubquiz.question import Question
+from pubquiz.round import Round
+
+PathLike = Union[str, Path]
+
+# The columns holding the fields of a Question
+question_columns = [f.name for f in fields(Question) if f.init]
+# The fields that hold lists, which are stored as JSON
+list_columns = {"alternates"}
+
+_schema = f"""
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f"{c} {'REAL' if c.endswith('_height') else 'TEXT'}" for c in question_columns)},
+    category TEXT,
+    difficulty INTEGER,
+    has_picture INTEGER NOT NULL,
+    last_used TEXT,
+    source TEXT,
+    fingerprint TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS questions_by_category ON questions(category, has_picture, last_used);
+CREATE INDEX IF NOT EXISTS questions_by_last_used ON questions(last_used);
+CREATE TABLE IF NOT EXISTS signatures (
+    question_id INTEGER PRIMARY KEY REFERENCES questions(id) ON DELETE CASCADE,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, question_id)
+) WITHOUT ROWID;
+"""
+
+
+def bank_path() -> Path:
+    """Return the default location of the question bank.
+
+    This is ``$PUBQUIZ_BANK`` if set, and otherwise ``$XDG_DATA_HOME/pubquiz/bank.sqlite``
+    (``~/.local/share/pubquiz/bank.sqlite``).
+    """
+    if "PUBQUIZ_BANK" in os.environ:
+        return Path(os.environ["PUBQUIZ_BANK"])
+    data_home = os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share")
+    return Path(data_home) / "pubquiz" / "bank.sqlite"
+
+
+def fingerprint(question: Optional[str], answer: Optional[str]) -> str:
+    """Identify a question by its (whitespace- and case-normalised) text, to avoid importing it twice."""
+    text = "\n".join(" ".join(str(s or "").lower().split()) for s in (question, answer))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def question_to_dict(question: Question) -> Dict[str, Any]:
+    """Convert a question into a dictionary for a quiz yaml file, leaving out the fields that have default values."""
+    default = Question()
+    return {
+        c: getattr(question, c)
+        for c in question_columns
+        if getattr(question, c) != getattr(default, c)
+    }
+
+
+@dataclass
+class Duplicate:
+    """Class representing a question that is (nearly) the same as one in the bank."""
+
+    question: Question
+    match: Question
+    similarity: float
+    # The yaml file the question in the bank was imported from
+    source: Optional[str] = None
+
+
+class QuestionBank:
+    """Class representing a bank of questions, stored in an SQLite database."""
+
+    def __init__(self, path: Optional[PathLike] = None):
+        """Open the bank, creating it if it does not exist yet.
+
+        :param path: the database file (defaults to :func:`bank_path`)
+        """
+        self.path = Path(path) if path else bank_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(_schema)
+        # Banks created by older versions lack the columns of newer fields
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(questions)")}
+        for column in question_columns:
+            if column not in existing:
+                self.connection.execute(f"ALTER TABLE questions ADD COLUMN {column} TEXT")
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def add(
+        self,
+        question: Question,
+        category: Optional[str] = None,
+        difficulty: Optional[int] = None,
+        tags: Iterable[str] = (),
+        last_used: Optional[datetime.date] = None,
+        source: Optional[str] = None,
+    ) -> int:
+        """Add a question to the bank.
+
+        A question that is already in the bank is not duplicated; instead its tags are added to, and its last use
+        is updated if ``last_used`` is more recent.
+
+        :returns: the id of the question in the bank
+        """
+        with self.connection:
+            return self._add(question, category, difficulty, tags, last_used, source)
+
+    def _add(
+        self,
+        question: Question,
+        category: Optional[str],
+        difficulty: Optional[int],
+        tags: Iterable[str],
+        last_used: Optional[datetime.date],
+        source: Optional[str],
+    ) -> int:
+        """Add a question to the bank, without committing (see :meth:`add`)."""
+        values = [getattr(question, c) for c in question_columns]
+        values = [
+            str(v) if isinstance(v, Path) else json.dumps(v) if isinstance(v, list) else v
+            for v in values
+        ]
+        has_picture = bool(question.question_pic or question.answer_pic)
+        used = last_used.isoformat() if last_used else None
+        key = fingerprint(question.question, question.answer)
+
+        cursor = self.connection.execute(
+            f"INSERT OR IGNORE INTO questions ({', '.join(question_columns)}, category, difficulty, "
+            "has_picture, last_used, source, fingerprint) "
+            f"VALUES ({', '.join('?' * (len(question_columns) + 6))})",
+            values + [category, difficulty, has_picture, used, source, key],
+        )
+        qid, previous = self.connection.execute(
+            "SELECT id, last_used FROM questions WHERE fingerprint = ?", (key,)
+        ).fetchone()
+        if cursor.rowcount:
+            self._index(qid, question.question, question.answer)
+        if used and (previous is None or previous < used):
+            self.connection.execute("UPDATE questions SET last_used = ? WHERE id = ?", (used, qid))
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO tags (tag, question_id) VALUES (?, ?)",
+            [(tag.lower(), qid) for tag in tags],
+        )
+        return qid
+
+    def _index(self, qid: int, question: Optional[str], answer: Optional[str]):
+        """Store the MinHash signature of a question and its LSH buckets (see :mod:`pubquiz.dedup`)."""
+        sig = dedup.signature(question, answer)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO signatures (question_id, signature) VALUES (?, ?)",
+            (qid, dedup.pack(sig)),
+        )
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO buckets (band, bucket, question_id) VALUES (?, ?, ?)",
+            [(band, key, qid) for band, key in enumerate(dedup.band_keys(sig))],
+        )
+
+    def index_signatures(self) -> int:
+        """Compute the signatures of the questions that do not have one yet (e.g. from older versions of pubquiz).
+
+        :returns: the number of questions indexed
+        """
+        rows = self.connection.execute(
+            "SELECT id, question, answer FROM questions "
+            "WHERE id NOT IN (SELECT question_id FROM signatures)"
+        ).fetchall()
+        with self.connection:
+            for row in rows:
+                self._index(*row)
+        return len(rows)
+
+    def duplicates(
+        self,
+        questions: Iterable[Question],
+        threshold: float = 0.5,
+        exclude_source: Optional[PathLike] = None,
+    ) -> List[Duplicate]:
+        """Find the questions in the bank that are near-duplicates of some new questions.
+
+        Only the questions that share an LSH bucket with a new question are compared with it, so this takes
+        milliseconds per question however large the bank is.
+
+        :param questions: the new questions
+        :param threshold: the minimum (estimated) Jaccard similarity of the shingles of two duplicates
+        :param exclude_source: ignore the questions that were imported from this yaml file (e.g. the new quiz
+            itself, if it was already imported)
+
+        :returns: the duplicates, most similar first
+        """
+        self.index_signatures()
+        exclude = str(Path(exclude_source).resolve()) if exclude_source else None
+
+        found = []
+        for q in questions:
+            sig = dedup.signature(q.question, q.answer)
+            keys = dedup.band_keys(sig)
+            candidates = self.connection.execute(
+                "SELECT DISTINCT s.question_id, s.signature, q.source FROM buckets b "
+                "JOIN signatures s ON s.question_id = b.question_id "
+                "JOIN questions q ON q.id = b.question_id "
+                f"WHERE {' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(keys))}",
+                [x for band, key in enumerate(keys) for x in (band, key)],
+            ).fetchall()
+            scores = dedup.similarities(sig, [c[1] for c in candidates])
+            for (qid, _, source), score in zip(candidates, scores):
+                if score >= threshold and (exclude is None or source != exclude):
+                    found.append(Duplicate(q, self.get([qid])[0], score, source))
+        return sorted(found, key=lambda d: -d.similarity)
+
+    def import_yaml(
+        self,
+        yaml_file: PathLike,
+        category: Optional[str] = None,
+        tags: Iterable[str] = (),
+        difficulty: Optional[int] = None,
+        used: bool = True,
+    ) -> int:
+        """Import all the questions of a quiz yaml file.
+
+        Paths to pictures and other files are made absolute, as the quizzes assembled from the bank will be
+        elsewhere. The questions of a round without a ``category`` fall back on the title of the round.
+
+        :param yaml_file: the quiz yaml file
+        :param category: the category of questions that do not specify one (instead of the title of the round)
+        :param tags: tags to add to all the questions
+        :param difficulty: the difficulty of questions that do not specify one
+        :param used: if True, record that the questions were used when the file was last modified
+
+        :returns: the number of questions imported
+        """
+        yaml_file = Path(yaml_file).resolve()
+        dct = load_yaml(yaml_file)
+        last_used = None
+        if used:
+            last_used = datetime.date.fromtimestamp(yaml_file.stat().st_mtime)
+
+        count = 0
+        # A single transaction for the whole file, as committing every question is very slow
+        with self.connection:
+            for round_dct in dct.get("rounds", []):
+                round_category = round_dct.get("category", category or round_dct.get("title"))
+                for q_dct in round_dct.get("questions", []):
+                    q_dct = dict(q_dct)
+                    q_tags = q_dct.pop("tags", [])
+                    q_tags = list(tags) + ([q_tags] if isinstance(q_tags, str) else list(q_tags))
+                    q_category = q_dct.pop("category", round_category)
+                    q_difficulty = q_dct.pop("difficulty", difficulty)
+                    for attr in ["question_pic", "answer_pic", "question_slide", "answer_slide"]:
+                        path = yaml_file.parent / str(q_dct.get(attr, ""))
+                        if attr in q_dct and path.is_file():
+                            q_dct[attr] = str(path)
+                    self._add(
+                        Question.from_dict(q_dct),
+                        q_category.lower() if q_category else None,
+                        q_difficulty,
+                        q_tags,
+                        last_used,
+                        str(yaml_file),
+                    )
+                    count += 1
+        return count
+
+    def find(
+        self,
+        n: Optional[int] = None,
+        category: Optional[str] = None,
+        tags: Sequence[str] = (),
+        pictures: Optional[bool] = None,
+        unused: bool = False,
+        not_used_since: Optional[datetime.date] = None,
+        difficulty: Optional[Sequence[int]] = None,
+    ) -> List[int]:
+        """Find questions in the bank, least recently used first.
+
+        :param n: the maximum number of questions to return
+        :param category: only return questions in this category
+        :param tags: only return questions with all of these tags
+        :param pictures: if True, only return questions with pictures; if False, only questions without
+        :param unused: if True, only return questions that have never been used
+        :param not_used_since: only return questions that have not been used on or after this date
+        :param difficulty: only return questions with a difficulty between these two values (inclusive)
+
+        :returns: the ids of the questions
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category.lower())
+        if pictures is not None:
+            conditions.append("has_picture = ?")
+            params.append(int(pictures))
+        if unused:
+            conditions.append("last_used IS NULL")
+        if not_used_since is not None:
+            conditions.append("(last_used IS NULL OR last_used < ?)")
+            params.append(not_used_since.isoformat())
+        if difficulty is not None:
+            conditions.append("difficulty BETWEEN ? AND ?")
+            params += list(difficulty)
+        for tag in tags:
+            conditions.append("id IN (SELECT question_id FROM tags WHERE tag = ?)")
+            params.append(tag.lower())
+
+        query = "SELECT id FROM questions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # Never-used questions (NULL) come first
+        query += " ORDER BY last_used, id"
+        if n is not None:
+            query += " LIMIT ?"
+            params.append(n)
+        return [row[0] for row in self.connection.execute(query, params)]
+
+    def get(self, ids: Sequence[int]) -> List[Question]:
+        """Load questions from the bank, in the same order as ``ids``."""
+        rows: Dict[int, Sequence[Any]] = {}
+        # Stay well below SQLite's limit on the number of parameters
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            rows.update(
+                (row[0], row[1:])
+                for row in self.connection.execute(
+                    f"SELECT id, {', '.join(question_columns)} FROM questions "
+                    f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return [
+            Question.from_dict(
+                {
+                    c: json.loads(v) if c in list_columns else v
+                    for c, v in zip(question_columns, rows[i])
+                    if v is not None
+                }
+            )
+            for i in ids
+        ]
+
+    def mark_used(self, ids: Sequence[int], date: Optional[datetime.date] = None):
+        """Record that questions were used (today, unless ``date`` is given)."""
+        used = (date or datetime.date.today()).isoformat()
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE questions SET last_used = ? WHERE id = ?", [(used, i) for i in ids]
+            )
+
+    def round(self, title: str, mark_used: bool = False, **query) -> Round:
+        """Assemble a round from the questions that match a query.
+
+        :param title: the title of the round
+        :param mark_used: if True, record that the questions of the round were used today
+        :param query: the query for the questions (see :meth:`find`), e.g. ``n=10, category="music"``
+
+        :returns: the round
+        """
+        ids = self.find(**query)
+        if mark_used:
+            self.mark_used(ids)
+        return Round(title, questions=self.get(ids))
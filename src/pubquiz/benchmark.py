@@ -0,0 +1,216 @@
+"""Module for benchmarking pubquiz on synthetic quizzes of any size.
+
+Run with ``pubquiz benchmark`` (see ``pubquiz benchmark --help``). Each run can be appended to a JSON lines
+file, so that the timings of different releases can be compared.
+"""
+
+import base64
+import json
+import os
+import platform
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import yaml
+
+from pubquiz.quiz import Quiz
+from pubquiz.version import VERSION
+
+PathLike = Union[str, Path]
+
+# A 1x1 grey png, so that the questions with pictures refer to a file that exists
+_picture = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAACklEQVR4nGNoAAAAggCBd81ytgAAAABJRU5ErkJggg=="
+)
+picture_name = "picture.png"
+
+
+def synthetic_quiz(
+    rounds: int = 10,
+    questions: int = 10,
+    pictures: float = 0.0,
+    solve_in_own_time: float = 0.0,
+    randomize: float = 0.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Generate the contents of the yaml file of a synthetic quiz.
+
+    :param rounds: the number of rounds
+    :param questions: the number of questions per round
+    :param pictures: the fraction of questions with a picture (in the question and the answer)
+    :param solve_in_own_time: the fraction of rounds that are solved in the teams' own time
+    :param randomize: the fraction of rounds whose questions are shuffled
+    :param seed: the seed for choosing which rounds and questions get these features
+
+    :returns: a dictionary that can be dumped to yaml and loaded with :meth:`Quiz.from_yaml`
+    """
+    rng = random.Random(seed)
+    dct: Dict[str, Any] = {"title": "Synthetic Quiz", "author": "pubquiz benchmark", "rounds": []}
+    for ir in range(rounds):
+        round_dct: Dict[str, Any] = {
+            "title": f"Round {ir + 1}",
+            "description": f"Synthetic round {ir + 1} of {rounds}",
+            "solve_in_own_time": rng.random() < solve_in_own_time,
+            "randomize": rng.random() < randomize,
+            "questions": [],
+        }
+        for iq in range(questions):
+            q_dct: Dict[str, Any] = {
+                "question": f"What is question {iq + 1} of round {ir + 1}?",
+                "answer": f"Answer {iq + 1}.{ir + 1}",
+            }
+            if rng.random() < pictures:
+                q_dct["question_pic"] = picture_name
+                q_dct["answer_pic"] = picture_name
+            round_dct["questions"].append(q_dct)
+        dct["rounds"].append(round_dct)
+    return dct
+
+
+def write_synthetic_quiz(directory: PathLike, **kwargs) -> Path:
+    """Write a synthetic quiz (see :func:`synthetic_quiz`) and the pictures it refers to into ``directory``.
+
+    :returns: the yaml file of the quiz
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    # The picture of the questions, and the one on the title slide
+    for name in [picture_name, "photo.png"]:
+        (directory / name).write_bytes(_picture)
+    yaml_file = directory / "quiz.yaml"
+    yaml_file.write_text(yaml.safe_dump(synthetic_quiz(**kwargs), sort_keys=False))
+    return yaml_file
+
+
+@dataclass
+class BenchmarkResult:
+    """Class representing the timings of one benchmark run."""
+
+    config: Dict[str, Any]
+    timings: Dict[str, float] = field(default_factory=dict)
+    version: str = VERSION
+    python: str = platform.python_version()
+    timestamp: str = ""
+
+    def to_json(self) -> str:
+        """Serialize the result to a single line of JSON."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+def _best_of(repeat: int, setup: Callable[[], Any], run: Callable[[Any], Any]) -> float:
+    """Time ``run(setup())`` ``repeat`` times, returning the fastest time (the least noisy estimate)."""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(
+    directory: PathLike,
+    rounds: int = 10,
+    questions: int = 10,
+    pictures: float = 0.0,
+    solve_in_own_time: float = 0.0,
+    randomize: float = 0.0,
+    seed: int = 0,
+    repeat: int = 5,
+    compile_pdfs: bool = False,
+) -> BenchmarkResult:
+    """Time loading and rendering (and optionally compiling) a synthetic quiz.
+
+    Every stage is timed on a freshly loaded quiz, so that work done lazily by an earlier stage (such as
+    resolving the paths of the questions) is not left out.
+
+    :param directory: the (scratch) directory in which to write the quiz and its outputs
+    :param rounds: the number of rounds
+    :param questions: the number of questions per round
+    :param pictures: the fraction of questions with a picture
+    :param solve_in_own_time: the fraction of rounds that are solved in the teams' own time
+    :param randomize: the fraction of rounds whose questions are shuffled
+    :param seed: the seed for generating the quiz
+    :param repeat: the number of times to repeat each stage (the fastest time is kept)
+    :param compile_pdfs: if True, also time compiling the sheets and slides with pdflatex (once, bypassing the
+        cache)
+
+    :returns: the timings of every stage, in seconds
+    """
+    config = dict(
+        rounds=rounds,
+        questions=questions,
+        pictures=pictures,
+        solve_in_own_time=solve_in_own_time,
+        randomize=randomize,
+        seed=seed,
+    )
+    directory = Path(directory).resolve()
+    yaml_file = write_synthetic_quiz(directory, **config)
+    result = BenchmarkResult(
+        config=config, timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+
+    cwd = os.getcwd()
+    try:
+        # The files referred to by the quiz are relative to its yaml file
+        os.chdir(directory)
+        timings = result.timings
+        timings["from_yaml"] = _best_of(
+            repeat, lambda: None, lambda _: Quiz.from_yaml(yaml_file, use_cache=False)
+        )
+        Quiz.from_yaml(yaml_file)
+        timings["from_yaml (cached)"] = _best_of(
+            repeat, lambda: None, lambda _: Quiz.from_yaml(yaml_file)
+        )
+
+        def load():
+            quiz = Quiz.from_yaml(yaml_file)
+            quiz.template_dir = directory
+            return quiz
+
+        timings["to_sheets"] = _best_of(repeat, load, lambda quiz: quiz.to_sheets())
+        timings["to_sheets (answers)"] = _best_of(
+            repeat, load, lambda quiz: quiz.to_sheets(with_answers=True)
+        )
+        timings["to_slides"] = _best_of(repeat, load, lambda quiz: quiz.to_slides())
+
+        if compile_pdfs:
+            from pubquiz.build import build
+
+            start = time.perf_counter()
+            outputs = build(load(), ["sheets", "slides"], jobs=0, force=True, directory=directory)
+            timings["compile"] = time.perf_counter() - start
+            failed = [o for o, r in outputs.items() if r is None or not r.ok]
+            if failed:
+                raise RuntimeError(
+                    f"Compiling the {' and '.join(failed)} of the benchmark quiz failed"
+                )
+    finally:
+        os.chdir(cwd)
+
+    return result
+
+
+def record(result: BenchmarkResult, path: PathLike):
+    """Append a benchmark result to a JSON lines file."""
+    with open(path, "a") as f:
+        f.write(result.to_json() + "\n")
+
+
+def previous_result(result: BenchmarkResult, path: PathLike) -> Optional[BenchmarkResult]:
+    """Find the most recent result recorded in ``path`` with the same configuration as ``result``."""
+    if not Path(path).exists():
+        return None
+    previous: List[BenchmarkResult] = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                candidate = BenchmarkResult(**json.loads(line))
+                if candidate.config == result.config:
+                    previous.append(candidate)
+    return previous[-1] if previous else None
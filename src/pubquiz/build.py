@@ -0,0 +1,421 @@
+"""Module for building the pdfs of a quiz: rendering, caching and compiling the outputs."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pubquiz.cache import BuildCache, build_key, cache_dir, file_hash
+from pubquiz.compile import CompileResult, compile_all, precompile_header
+from pubquiz.images import prepare_images
+from pubquiz.latex_templates import path as latex_templates_path
+from pubquiz.quiz import Quiz, copy_template, templates
+from pubquiz.timings import active, stage
+from pubquiz.validate import check
+
+valid_outputs = list(templates)
+
+
+def write_latex(chunks: Iterable[str], f: BinaryIO) -> str:
+    r"""Stream LaTeX code to a file, or to any other binary stream such as the stdin of a subprocess.
+
+    The chunks are separated by newlines, so that the output is the same as ``"\n".join(chunks)`` but without
+    ever holding the whole document in memory.
+
+    :param chunks: the chunks of LaTeX code
+    :param f: the stream to write to
+
+    :returns: the sha256 hash of everything that was written
+    """
+    sha = hashlib.sha256()
+    separator = b""
+    for chunk in chunks:
+        data = separator + chunk.encode("utf-8")
+        sha.update(data)
+        f.write(data)
+        separator = b"\n"
+    return sha.hexdigest()
+
+
+def write_if_changed(path: Path, chunks: Iterable[str]) -> str:
+    """Stream LaTeX code to ``path``, leaving the file untouched if it already has this content.
+
+    :returns: the sha256 hash of the LaTeX code
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        digest = write_latex(chunks, f)
+    if path.exists() and file_hash(path) == digest:
+        os.remove(tmp)
+    else:
+        os.replace(tmp, path)
+    return digest
+
+
+def iter_latex(quiz: Quiz, output: str) -> Iterator[str]:
+    """Generate the LaTeX code for one of the outputs of a quiz, one chunk at a time."""
+    if output == "sheets":
+        return quiz.iter_sheets()
+    elif output == "slides":
+        return quiz.iter_slides()
+    raise ValueError(f"Unknown output '{output}'; must be one of {valid_outputs}")
+
+
+def _record_passes(result: CompileResult):
+    """Record the time spent in every pdflatex pass of a compile, if timings are being recorded."""
+    timings = active()
+    if timings is not None:
+        for i, (wall, cpu) in enumerate(zip(result.passes, result.cpu)):
+            timings.add(f"pdflatex {result.name}.tex: pass {i + 1}", wall, cpu)
+
+
+def merge_document(pdfs: List[Path]) -> str:
+    """Generate a LaTeX document that concatenates several pdfs, keeping the page size of each."""
+    lines = [r"\documentclass{article}", r"\usepackage{pdfpages}", r"\begin{document}"]
+    lines += [r"\includepdf[pages=-,fitpaper]{" + pdf.name + "}" for pdf in pdfs]
+    lines += [r"\end{document}"]
+    return "\n".join(lines)
+
+
+def _documents(
+    quiz: Quiz, output: str, split_rounds: bool, directory: Path
+) -> List[Tuple[Path, Iterable[str], List[Path]]]:
+    """List the LaTeX documents to compile for an output, along with the files each of them refers to."""
+    if not split_rounds:
+        return [
+            (directory / f"{output}.tex", iter_latex(quiz, output), quiz.referenced_files(output))
+        ]
+
+    parts_dir = directory / ".pubquiz" / f"{output}-parts"
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    if output == "sheets":
+        parts = quiz.to_sheets_parts()
+    else:
+        parts = quiz.to_slides_parts()
+
+    # The first part is the title page, followed by one part per round
+    headers = [quiz.template_dir / t for t in templates[output]]
+    files = [headers] + [headers + r.referenced_files() for r in quiz]
+    if output == "sheets":
+        files *= quiz.variants
+    return [
+        (parts_dir / f"{output}-{i:02d}.tex", [latex], f)
+        for i, (latex, f) in enumerate(zip(parts, files))
+    ]
+
+
+def build(
+    quiz: Quiz,
+    outputs: List[str],
+    no_compile: bool = False,
+    jobs: int = 1,
+    force: bool = False,
+    cache: Optional[BuildCache] = None,
+    split_rounds: bool = False,
+    directory: Optional[Path] = None,
+    image_dpi: Optional[int] = None,
+    precompile: bool = False,
+) -> Dict[str, Optional[CompileResult]]:
+    """Write the LaTeX files for a quiz and compile those that are not already cached.
+
+    With ``split_rounds``, the title page and every round are written to standalone documents that share the
+    header. These are compiled in parallel (and cached individually, so that editing a round only recompiles
+    that round) and then merged into the final pdf. Note that page numbers restart in every part.
+
+    :param quiz: the quiz to build
+    :param outputs: the outputs to build (``"sheets"`` and/or ``"slides"``)
+    :param no_compile: if True, only write the LaTeX files
+    :param jobs: the number of documents to compile in parallel (0 means one per CPU core)
+    :param force: if True, recompile even when the cache holds an up-to-date pdf
+    :param cache: the cache of compiled pdfs (defaults to the user-wide cache)
+    :param split_rounds: if True, compile every round separately and merge the resulting pdfs
+    :param directory: the directory in which to write the LaTeX files and pdfs (defaults to the current
+        directory; files referred to by the quiz are still looked up relative to the current directory)
+    :param image_dpi: if given, downsample the pictures of the quiz to this resolution first
+    :param precompile: if True, load the header from a precompiled format (see :func:`precompile_header`)
+
+    :returns: the result of compiling each output, or None for outputs that were not compiled
+
+    :raises ValidationError: if any of the files the quiz refers to are missing or broken (checked before
+        anything is compiled)
+    """
+    cache = cache or BuildCache()
+    directory = directory or Path(".")
+
+    if not no_compile:
+        with stage("validate"):
+            check(quiz)
+
+    seed = quiz.seed_variants()
+    if seed is not None:
+        print(f"Shuffling the variants with seed {seed}; use it again to print the same sheets")
+
+    if image_dpi:
+        with stage("prepare images"):
+            quiz = prepare_images(quiz, dpi=image_dpi)
+
+    results: Dict[str, Optional[CompileResult]] = {}
+    documents = {}
+    keys = {}
+    tex_files = []
+    formats = []
+    for o in outputs:
+        # The templates are part of the key of every document, so they have to exist before it is computed
+        quiz.copy_templates(o)
+        documents[o] = _documents(quiz, o, split_rounds, directory)
+        results[o] = None
+        fmt = None
+
+        for tex_file, latex, files in documents[o]:
+            with stage(f"write {tex_file.name}"):
+                digest = write_if_changed(tex_file, latex)
+
+            if no_compile:
+                continue
+
+            with stage(f"look up {tex_file.stem}.pdf in the cache"):
+                keys[tex_file.stem] = build_key(digest, files)
+                cached = None if force else cache.get(keys[tex_file.stem])
+            if cached:
+                shutil.copy(cached, tex_file.with_suffix(".pdf"))
+                continue
+
+            # The header only exists once the first document has been rendered
+            if precompile and fmt is None:
+                with stage(f"precompile {o}_header"):
+                    fmt = precompile_header(f"{o}_header", quiz.template_dir) or ""
+            tex_files.append(tex_file)
+            formats.append(fmt or None)
+
+    compiled = {}
+    texinputs = [Path.cwd(), quiz.template_dir]
+    with stage("compile"):
+        outcomes = compile_all(tex_files, jobs=jobs, texinputs=texinputs, formats=formats)
+    for result in outcomes:
+        _record_passes(result)
+        if result.ok and result.pdf is not None:
+            cache.put(keys[result.name], result.pdf)
+        compiled[result.name] = result
+
+    if not split_rounds:
+        results.update(compiled)
+        return results
+
+    # Merge the parts of each output whose parts all compiled successfully
+    merges = []
+    for o in outputs:
+        failed = [compiled[t.stem] for t, _, _ in documents[o] if t.stem in compiled]
+        failed = [r for r in failed if not r.ok]
+        if no_compile or failed:
+            results[o] = failed[0] if failed else None
+            continue
+
+        pdfs = [t.with_suffix(".pdf") for t, _, _ in documents[o]]
+        merge_file = pdfs[0].parent / f"{o}.tex"
+        digest = write_if_changed(merge_file, [merge_document(pdfs)])
+        keys[o] = build_key(digest, pdfs)
+        cached = None if force else cache.get(keys[o])
+        if cached:
+            shutil.copy(cached, directory / f"{o}.pdf")
+        else:
+            merges.append(merge_file)
+
+    with stage("merge"):
+        merged = compile_all(merges, jobs=jobs)
+    for result in merged:
+        _record_passes(result)
+        if result.ok and result.pdf is not None:
+            cache.put(keys[result.name], result.pdf)
+            shutil.copy(result.pdf, directory / f"{result.name}.pdf")
+        results[result.name] = result
+
+    return results
+
+
+def template_store(outputs: Iterable[str], overrides: Optional[Path] = None) -> Path:
+    """Gather the templates of some outputs into a directory of the cache that is named after their contents.
+
+    Customised templates in ``overrides`` take precedence over the default ones. The directory is never
+    modified once it exists, so any number of builds that use the same templates can share it, and none of
+    them has to copy the templates into the workspace.
+
+    :param outputs: the outputs whose templates to gather (``"sheets"`` and/or ``"slides"``)
+    :param overrides: the directory with the customised templates, if any (defaults to the current directory)
+
+    :returns: the directory containing the templates
+    """
+    sources = {}
+    for o in outputs:
+        for name in templates[o]:
+            for source in [Path(overrides or ".") / name, latex_templates_path / name]:
+                if source.exists():
+                    sources[name] = source
+                    break
+
+    sha = hashlib.sha256()
+    for name, source in sorted(sources.items()):
+        sha.update(f"{name}:{file_hash(source)}\n".encode())
+    directory = cache_dir() / "templates" / sha.hexdigest()
+    if directory.exists():
+        return directory
+
+    # Fill a temporary directory and rename it into place, so that no build ever sees a partial one
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=directory.parent, suffix=".tmp"))
+    for name, source in sources.items():
+        shutil.copy(source, tmp / name)
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        # Another build got there first
+        shutil.rmtree(tmp)
+    return directory
+
+
+def build_isolated(
+    quiz: Quiz, outputs: List[str], build_dir: Path, name: str, **kwargs
+) -> Dict[str, Optional[CompileResult]]:
+    """Build a quiz out of tree, so that any number of builds can share a workspace and a build directory.
+
+    The templates come from :func:`template_store` instead of being copied into the workspace, and the LaTeX
+    files are written and compiled in a scratch directory of this build's own. Only the finished files are
+    moved into ``build_dir/name``, each in a single atomic step. The scratch directory is then removed, unless
+    a compile failed (so that its log can be read).
+
+    :param quiz: the quiz to build
+    :param outputs: the outputs to build (``"sheets"`` and/or ``"slides"``)
+    :param build_dir: the build directory
+    :param name: the name of the subdirectory for this quiz (usually the name of its yaml file)
+    :param kwargs: the other arguments of :func:`build`
+
+    :returns: the result of compiling each output, or None for outputs that were not compiled
+    """
+    build_dir = Path(build_dir).resolve()
+    quiz.template_dir = template_store(outputs)
+    (build_dir / ".scratch").mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=build_dir / ".scratch", prefix=f"{name}-"))
+    try:
+        results = build(quiz, outputs, directory=scratch, **kwargs)
+    except BaseException:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+
+    output_dir = build_dir / name
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for o in outputs:
+        if (scratch / f"{o}.tex").exists():
+            os.replace(scratch / f"{o}.tex", output_dir / f"{o}.tex")
+        if (scratch / f"{o}.pdf").exists():
+            os.replace(scratch / f"{o}.pdf", output_dir / f"{o}.pdf")
+            result = results[o]
+            if result is not None:
+                result.pdf = output_dir / f"{o}.pdf"
+
+    if all(r is None or r.ok for r in results.values()):
+        shutil.rmtree(scratch)
+    return results
+
+
+@dataclass
+class BatchResult:
+    """Class representing the outcome of building one of a batch of quizzes."""
+
+    yaml_file: Path
+    directory: Path
+    ok: bool
+    duration: float
+    message: str = ""
+
+
+def _build_one(
+    yaml_file: Path,
+    directory: Path,
+    template_dir: Path,
+    outputs: List[str],
+    force: bool,
+    image_dpi: Optional[int],
+    precompile: bool,
+) -> BatchResult:
+    """Build a single quiz of a batch (see :func:`build_many`)."""
+    start = time.perf_counter()
+    cwd = os.getcwd()
+    try:
+        # The files referred to by the quiz are relative to its yaml file
+        os.chdir(yaml_file.parent)
+        quiz = Quiz.from_yaml(yaml_file)
+        quiz.template_dir = template_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        results = build(
+            quiz,
+            outputs,
+            jobs=1,
+            force=force,
+            directory=directory,
+            image_dpi=image_dpi,
+            precompile=precompile,
+        )
+        failed = [f"{o}: see {r.log}" for o, r in results.items() if r is not None and not r.ok]
+        ok, message = not failed, "; ".join(failed)
+    except Exception as e:  # noqa: B902
+        ok, message = False, f"{type(e).__name__}: {e}"
+    finally:
+        os.chdir(cwd)
+    return BatchResult(yaml_file, directory, ok, time.perf_counter() - start, message)
+
+
+def build_many(
+    yaml_files: List[Path],
+    output_dir: Path,
+    outputs: List[str],
+    jobs: int = 0,
+    force: bool = False,
+    image_dpi: Optional[int] = None,
+    precompile: bool = False,
+) -> List[BatchResult]:
+    """Build several quizzes in parallel, each into its own subdirectory of ``output_dir``.
+
+    The templates are copied once into ``output_dir/templates`` and shared by all the quizzes. Customised
+    templates in the current directory take precedence over the default ones.
+
+    :param yaml_files: the yaml files of the quizzes
+    :param output_dir: the directory in which to build the quizzes
+    :param outputs: the outputs to build for every quiz (``"sheets"`` and/or ``"slides"``)
+    :param jobs: the number of quizzes to build in parallel (0 means one per CPU core)
+    :param force: if True, recompile even when the cache holds an up-to-date pdf
+    :param image_dpi: if given, downsample the pictures of the quizzes to this resolution
+    :param precompile: if True, precompile the shared headers once and load them in every compile
+
+    :returns: the outcome of building each quiz, in the same order as ``yaml_files``
+    """
+    output_dir = Path(output_dir).resolve()
+    template_dir = output_dir / "templates"
+    template_dir.mkdir(parents=True, exist_ok=True)
+    for o in outputs:
+        for name in templates[o]:
+            if Path(name).exists():
+                shutil.copy(name, template_dir)
+            else:
+                copy_template(name, template_dir)
+        if precompile:
+            precompile_header(f"{o}_header", template_dir)
+
+    tasks: List[Tuple[Path, Path, Path, List[str], bool, Optional[int], bool]] = []
+    for yaml_file in yaml_files:
+        yaml_file = Path(yaml_file).resolve()
+        directory = output_dir / yaml_file.stem
+        while any(directory == t[1] for t in tasks):
+            # Quizzes with the same name in different directories
+            directory = directory.with_name(directory.name + "_")
+        tasks.append((yaml_file, directory, template_dir, outputs, force, image_dpi, precompile))
+
+    if not tasks:
+        return []
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        futures = [executor.submit(_build_one, *task) for task in tasks]
+        return [f.result() for f in futures]
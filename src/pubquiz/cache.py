@@ -0,0 +1,130 @@
+"""Module for caching compiled pdfs, keyed on the content of everything that goes into them."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+from pubquiz.version import VERSION
+
+PathLike = Union[str, Path]
+
+# The extensions LaTeX tries when a file is referred to without one
+latex_extensions = [".tex", ".png", ".pdf", ".jpg", ".jpeg"]
+
+
+def cache_dir() -> Path:
+    """Return the directory where pubquiz stores its caches.
+
+    This is ``$PUBQUIZ_CACHE_DIR`` if set, and otherwise ``$XDG_CACHE_HOME/pubquiz`` (``~/.cache/pubquiz``).
+    """
+    if "PUBQUIZ_CACHE_DIR" in os.environ:
+        return Path(os.environ["PUBQUIZ_CACHE_DIR"])
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "pubquiz"
+
+
+def find_file(path: PathLike) -> Optional[Path]:
+    """Find the file LaTeX would load for ``path``, trying the default extensions if needed."""
+    path = Path(path)
+    if path.is_file():
+        return path
+    for ext in latex_extensions:
+        candidate = path.with_name(path.name + ext)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def file_hash(path: PathLike) -> str:
+    """Compute the sha256 hash of the contents of a file."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def build_key(latex_hash: str, files: Iterable[PathLike]) -> str:
+    r"""Compute the cache key for a LaTeX document.
+
+    :param latex_hash: the hash of the LaTeX code of the document (see :func:`pubquiz.build.write_latex`)
+    :param files: the files the document refers to (headers, ``\input`` files, pictures, ...)
+
+    :returns: a hash that changes whenever the document or any of the files it refers to changes
+    """
+    sha = hashlib.sha256(f"pubquiz {VERSION}\n".encode())
+    sha.update(latex_hash.encode())
+    for f in sorted({str(file) for file in files}):
+        found = find_file(f)
+        sha.update(f"\n{f}:{file_hash(found) if found else 'missing'}".encode())
+    return sha.hexdigest()
+
+
+def parse_size(size: str) -> int:
+    """Parse a human-readable size such as ``500M`` or ``2G`` into a number of bytes."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    size = size.strip().upper().rstrip("B")
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+class BuildCache:
+    """Class representing the on-disk cache of compiled pdfs."""
+
+    def __init__(self, directory: Optional[PathLike] = None):
+        """Initialize the cache."""
+        self.directory = Path(directory) if directory else cache_dir() / "pdfs"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached pdf for ``key``, or None if there is none."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        # Mark the entry as recently used, for the eviction in clean()
+        os.utime(path)
+        return path
+
+    def put(self, key: str, pdf: PathLike) -> Path:
+        """Store a copy of ``pdf`` in the cache under ``key``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Copy then rename, so that concurrent builds never see a half-written pdf
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        shutil.copy(pdf, tmp)
+        os.replace(tmp, self._path(key))
+        return self._path(key)
+
+    def size(self) -> int:
+        """Return the total size of the cache in bytes."""
+        if not self.directory.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.directory.glob("*.pdf"))
+
+    def clean(self, max_size: int = 0) -> Tuple[int, int]:
+        """Evict the least recently used pdfs until the cache is no larger than ``max_size``.
+
+        :param max_size: the maximum size of the cache in bytes (0 empties the cache)
+
+        :returns: the number of files removed and the number of bytes freed
+        """
+        if not self.directory.exists():
+            return 0, 0
+        entries = sorted(
+            ((p, p.stat()) for p in self.directory.glob("*.pdf")), key=lambda e: e[1].st_mtime
+        )
+        total = sum(st.st_size for _, st in entries)
+        removed, freed = 0, 0
+        for path, st in entries:
+            if total <= max_size:
+                break
+            path.unlink()
+            total -= st.st_size
+            removed += 1
+            freed += st.st_size
+        return removed, freed
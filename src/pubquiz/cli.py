@@ -14,11 +14,10 @@ later, but that will cause problems--the code will get executed twice:
 """
 
 import logging
-import subprocess
 
 import click
 
-from pubquiz import Quiz
+from pubquiz.version import VERSION
 
 __all__ = [
     "main",
@@ -26,14 +25,96 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+# The CLI is often called many times from scripts, so everything beyond click is imported in the commands that
+# need it. In particular, ``--version`` and ``--help`` should not have to import yaml or the rest of pubquiz.
+valid_outputs = ["sheets", "slides"]
+
 
 @click.group()
-@click.version_option()
+@click.version_option(version=VERSION)
 def main():
     """CLI for pubquiz."""
 
 
-valid_outputs = ["sheets", "slides"]
+def _outputs(output):
+    return valid_outputs if output == "all" else [output]
+
+
+def _report(results):
+    """Report the outcome of building each output."""
+    for name, result in results.items():
+        if result is None:
+            click.echo(f"{name}.pdf: up to date")
+        elif result.ok:
+            timings = " + ".join(f"{t:.1f}s" for t in result.passes)
+            click.echo(f"{name}.pdf: compiled in {len(result.passes)} pass(es) ({timings})")
+        elif not result.log.exists():
+            logger.error(f"Could not run pdflatex on {name}.tex. Is pdflatex installed?")
+        else:
+            logger.error(
+                f"'pdflatex {name}.tex' returned non-zero exit code ({result.returncode}). "
+                f"See {result.log} to see what went wrong."
+            )
+
+
+image_dpi_option = click.option(
+    "--image-dpi",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Downsample the pictures to this resolution (in dots per inch) before compiling. Requires Pillow.",
+)
+
+precompile_option = click.option(
+    "--precompile-header",
+    is_flag=True,
+    default=False,
+    help="Precompile the headers into LaTeX formats, so that every compile starts faster.",
+)
+
+jobs_option = click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of documents to compile in parallel (0 means one per CPU core).",
+)
+
+
+bank_option = click.option(
+    "--bank",
+    "bank_file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="The question bank (defaults to $PUBQUIZ_BANK or ~/.local/share/pubquiz/bank.sqlite).",
+)
+
+
+def _report_duplicates(yaml_file, bank_file, threshold) -> int:
+    """Report the questions of a quiz that are near-duplicates of questions in the bank."""
+    from pubquiz.bank import QuestionBank
+    from pubquiz.quiz import Quiz
+
+    quiz = Quiz.from_yaml(yaml_file)
+    with QuestionBank(bank_file) as qb:
+        duplicates = qb.duplicates(
+            [q for r in quiz for q in r], threshold=threshold, exclude_source=yaml_file
+        )
+    for d in duplicates:
+        click.echo(
+            f"{d.question.question!r} is {d.similarity:.0%} similar to {d.match.question!r}"
+            + (f" (from {d.source})" if d.source else "")
+        )
+    return len(duplicates)
+
+
+threshold_option = click.option(
+    "--threshold",
+    type=click.FloatRange(0, 1),
+    default=0.5,
+    show_default=True,
+    help="Minimum similarity for two questions to count as duplicates.",
+)
 
 
 # Make a pub quiz from a yaml file
@@ -41,32 +122,661 @@ valid_outputs = ["sheets", "slides"]
 @click.argument("yaml_file", type=click.Path(exists=True))
 @click.argument("output", type=click.Choice(valid_outputs + ["all"]), default="all")
 @click.option("--no-compile", is_flag=True, default=False, help="Do not compile the output files.")
-def make(yaml_file, output, no_compile):
+@jobs_option
+@click.option(
+    "--force", is_flag=True, default=False, help="Recompile even if a cached pdf is up to date."
+)
+@click.option(
+    "--split-rounds",
+    is_flag=True,
+    default=False,
+    help="Compile every round as a separate document in parallel, then merge the pdfs.",
+)
+@image_dpi_option
+@precompile_option
+@click.option(
+    "--overlays",
+    is_flag=True,
+    default=False,
+    help="Show each question once and reveal its answer with an overlay of the same slide.",
+)
+@click.option(
+    "--timings",
+    is_flag=True,
+    default=False,
+    help="Print the wall and CPU time spent in every stage of the build.",
+)
+@click.option(
+    "--timings-json",
+    type=click.File("w"),
+    default=None,
+    help="Write the time spent in every stage of the build to this file as JSON ('-' for stdout).",
+)
+@click.option(
+    "--variants",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of variants of the sheets, with the questions of randomized rounds in a different order.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=None,
+    help="Seed for the order of the questions, so that the variants can be reproduced.",
+)
+@click.option(
+    "--check-duplicates",
+    is_flag=True,
+    default=False,
+    help="Before building, check the question bank for questions that were asked before.",
+)
+@bank_option
+@threshold_option
+@click.option(
+    "--build-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Build out of tree, into a subdirectory of this directory named after the yaml file, without writing "
+    "anything to the current directory. Any number of such builds can run at once.",
+)
+def make(
+    yaml_file,
+    output,
+    no_compile,
+    jobs,
+    force,
+    split_rounds,
+    image_dpi,
+    precompile_header,
+    overlays,
+    timings,
+    timings_json,
+    variants,
+    seed,
+    check_duplicates,
+    bank_file,
+    threshold,
+    build_dir,
+):
     """Make a pub quiz from a yaml file."""
-    if output == "all":
-        outputs = valid_outputs
-    else:
-        outputs = [output]
+    if check_duplicates and _report_duplicates(yaml_file, bank_file, threshold):
+        raise click.ClickException("The quiz repeats questions from the bank")
+
+    from contextlib import nullcontext
+    from pathlib import Path
+
+    from pubquiz.build import build, build_isolated
+    from pubquiz.quiz import Quiz
+    from pubquiz.timings import recording
+    from pubquiz.validate import ValidationError
+
+    with recording() if timings or timings_json else nullcontext() as recorded:
+        quiz = Quiz.from_yaml(yaml_file)
+        quiz.overlays = quiz.overlays or overlays
+        quiz.variants = variants or quiz.variants
+        if seed is not None:
+            quiz.reseed(seed)
+
+        options = dict(
+            no_compile=no_compile,
+            jobs=jobs,
+            force=force,
+            split_rounds=split_rounds,
+            image_dpi=image_dpi,
+            precompile=precompile_header,
+        )
+        try:
+            if build_dir:
+                # Leave the workspace untouched, so that any number of builds can run in it at once
+                name = Path(yaml_file).stem
+                results = build_isolated(quiz, _outputs(output), Path(build_dir), name, **options)
+            else:
+                results = build(quiz, _outputs(output), **options)
+        except ValidationError as e:
+            raise click.ClickException(str(e))
+    if not no_compile:
+        _report(results)
+
+    if timings:
+        click.echo(recorded.table())
+    if timings_json:
+        timings_json.write(recorded.to_json() + "\n")
+
+
+def _find_quizzes(sources):
+    """Expand directories and glob patterns into a list of yaml files."""
+    import glob
+    from pathlib import Path
+
+    yaml_files = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            yaml_files += sorted(list(path.glob("*.yaml")) + list(path.glob("*.yml")))
+        elif path.exists():
+            yaml_files.append(path)
+        else:
+            yaml_files += [Path(f) for f in sorted(glob.glob(source))]
+    return yaml_files
+
+
+@main.command("make-many")
+@click.argument("sources", nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    default="build",
+    show_default=True,
+    help="Directory in which to build the quizzes (one subdirectory per quiz).",
+)
+@click.option(
+    "--output", type=click.Choice(valid_outputs + ["all"]), default="all", show_default=True
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of quizzes to build in parallel (0 means one per CPU core).",
+)
+@click.option(
+    "--force", is_flag=True, default=False, help="Recompile even if a cached pdf is up to date."
+)
+@image_dpi_option
+@precompile_option
+def make_many(sources, output_dir, output, jobs, force, image_dpi, precompile_header):
+    """Make several pub quizzes from yaml files, directories of yaml files, or glob patterns."""
+    from pathlib import Path
+
+    from pubquiz.build import build_many
+
+    yaml_files = _find_quizzes(sources)
+    if not yaml_files:
+        raise click.UsageError(f"No quiz yaml files found in {' '.join(sources)}")
+
+    results = build_many(
+        yaml_files,
+        Path(output_dir),
+        _outputs(output),
+        jobs=jobs,
+        force=force,
+        image_dpi=image_dpi,
+        precompile=precompile_header,
+    )
+
+    width = max(len(str(r.yaml_file.name)) for r in results)
+    click.echo(f"{'Quiz':<{width}}  Status  Time")
+    for r in results:
+        status = "ok" if r.ok else "FAILED"
+        line = f"{r.yaml_file.name:<{width}}  {status:<6}  {r.duration:.1f}s"
+        click.echo(line + (f"  {r.message}" if r.message else ""))
+
+    failures = sum(not r.ok for r in results)
+    click.echo(f"{len(results) - failures} succeeded, {failures} failed")
+    if failures:
+        raise click.exceptions.Exit(1)
+
+
+@main.command()
+@click.argument("yaml_file", type=click.Path(exists=True))
+@click.argument("output", type=click.Choice(valid_outputs + ["all"]), default="all")
+@jobs_option
+@click.option(
+    "--interval",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks for changes.",
+)
+@image_dpi_option
+@precompile_option
+def watch(yaml_file, output, jobs, interval, image_dpi, precompile_header):
+    """Rebuild a pub quiz whenever the yaml file or any file it refers to changes."""
+    from pubquiz.watch import Watcher
+
+    click.echo(f"Watching {yaml_file} for changes (press Ctrl+C to stop)")
+    try:
+        watcher = Watcher(
+            yaml_file,
+            _outputs(output),
+            jobs=jobs,
+            interval=interval,
+            image_dpi=image_dpi,
+            precompile=precompile_header,
+        )
+        watcher.run(_report)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@click.option("--rounds", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--questions", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option(
+    "--pictures",
+    type=click.FloatRange(0, 1),
+    default=0.0,
+    show_default=True,
+    help="Fraction of questions with a picture.",
+)
+@click.option(
+    "--solve-in-own-time",
+    type=click.FloatRange(0, 1),
+    default=0.0,
+    show_default=True,
+    help="Fraction of rounds that are solved in the teams' own time.",
+)
+@click.option(
+    "--randomize",
+    type=click.FloatRange(0, 1),
+    default=0.0,
+    show_default=True,
+    help="Fraction of rounds whose questions are shuffled.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="Number of times to repeat every stage (the fastest time is reported).",
+)
+@click.option(
+    "--compile", "compile_pdfs", is_flag=True, default=False, help="Also time compiling the pdfs."
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Append the timings to this JSON lines file, and compare them with the last matching run.",
+)
+def benchmark(
+    rounds, questions, pictures, solve_in_own_time, randomize, seed, repeat, compile_pdfs, record
+):
+    """Time loading, rendering and compiling a synthetic quiz."""
+    import tempfile
+
+    from pubquiz import benchmark as bench
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = bench.run_benchmark(
+            tmp,
+            rounds=rounds,
+            questions=questions,
+            pictures=pictures,
+            solve_in_own_time=solve_in_own_time,
+            randomize=randomize,
+            seed=seed,
+            repeat=repeat,
+            compile_pdfs=compile_pdfs,
+        )
+
+    previous = bench.previous_result(result, record) if record else None
+    click.echo(f"pubquiz {result.version}: {rounds} rounds x {questions} questions")
+    for stage, t in result.timings.items():
+        line = f"{stage:<22}{t * 1000:10.2f} ms"
+        if previous and stage in previous.timings:
+            line += f"  ({t / previous.timings[stage] - 1:+.0%} vs {previous.version})"
+        click.echo(line)
+
+    if record:
+        bench.record(result, record)
 
-    quiz = Quiz.from_yaml(yaml_file)
 
-    for o in outputs:
-        if o == "sheets":
-            string = quiz.to_sheets()
-        elif o == "slides":
-            string = quiz.to_slides()
-        with open(f"{o}.tex", "w") as f:
-            f.write(string)
-
-        if not no_compile:
-            proc = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode", f"{o}.tex"], stdout=subprocess.DEVNULL
+@main.group()
+def bank():
+    """Manage the question bank, and assemble quizzes from it."""
+
+
+@bank.command("import")
+@click.argument("yaml_files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@bank_option
+@click.option(
+    "--category", default=None, help="Category of questions without one (default: round title)."
+)
+@click.option(
+    "--tag", "tags", multiple=True, help="Tag to add to every question (may be repeated)."
+)
+@click.option("--difficulty", type=int, default=None, help="Difficulty of questions without one.")
+@click.option(
+    "--used/--unused",
+    default=True,
+    show_default=True,
+    help="Record the questions as used on the date the yaml file was last modified.",
+)
+def bank_import(yaml_files, bank_file, category, tags, difficulty, used):
+    """Import the questions of quiz yaml files into the question bank."""
+    from pubquiz.bank import QuestionBank
+
+    with QuestionBank(bank_file) as qb:
+        for yaml_file in yaml_files:
+            n = qb.import_yaml(
+                yaml_file, category=category, tags=tags, difficulty=difficulty, used=used
             )
-            if proc.returncode != 0:
-                logger.error(
-                    f"'pdflatex {o}.tex' returned non-zero exit code. Try running pdflatex manually to "
-                    "see what went wrong."
-                )
+            click.echo(f"Imported {n} question(s) from {yaml_file}")
+        click.echo(f"The bank now holds {len(qb)} question(s)")
+
+
+@bank.command()
+@click.argument("yaml_file", type=click.Path(dir_okay=False))
+@bank_option
+@click.option("--round-title", required=True, help="Title of the round to add to YAML_FILE.")
+@click.option("-n", "--number", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--category", default=None)
+@click.option(
+    "--tag", "tags", multiple=True, help="Only pick questions with this tag (may be repeated)."
+)
+@click.option(
+    "--pictures/--no-pictures", default=None, help="Only pick questions with (or without) pictures."
+)
+@click.option(
+    "--unused", is_flag=True, default=False, help="Only pick questions that were never used."
+)
+@click.option(
+    "--not-used-since",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Only pick questions that were not used on or after this date.",
+)
+@click.option("--min-difficulty", type=int, default=None)
+@click.option("--max-difficulty", type=int, default=None)
+@click.option(
+    "--mark-used", is_flag=True, default=False, help="Record the picked questions as used today."
+)
+def pick(
+    yaml_file,
+    bank_file,
+    round_title,
+    number,
+    category,
+    tags,
+    pictures,
+    unused,
+    not_used_since,
+    min_difficulty,
+    max_difficulty,
+    mark_used,
+):
+    """Add a round of questions picked from the bank to YAML_FILE (creating it if needed).
+
+    The least recently used questions that match are picked first.
+    """
+    from pathlib import Path
+
+    import yaml
+
+    from pubquiz.bank import QuestionBank, question_to_dict
+
+    difficulty = None
+    if min_difficulty is not None or max_difficulty is not None:
+        difficulty = (
+            min_difficulty if min_difficulty is not None else -(1 << 31),
+            max_difficulty if max_difficulty is not None else 1 << 31,
+        )
+    with QuestionBank(bank_file) as qb:
+        r = qb.round(
+            round_title,
+            mark_used=mark_used,
+            n=number,
+            category=category,
+            tags=tags,
+            pictures=pictures,
+            unused=unused,
+            not_used_since=not_used_since.date() if not_used_since else None,
+            difficulty=difficulty,
+        )
+    if len(r) < number:
+        logger.warning(f"Only {len(r)} question(s) in the bank match")
+
+    path = Path(yaml_file)
+    dct = yaml.safe_load(path.read_text()) if path.exists() else None
+    dct = dct or {"title": "My Quiz", "author": "Quizmaster", "rounds": []}
+    dct.setdefault("rounds", []).append(
+        {"title": round_title, "questions": [question_to_dict(q) for q in r]}
+    )
+    path.write_text(yaml.safe_dump(dct, sort_keys=False, allow_unicode=True))
+    click.echo(f"Added round '{round_title}' with {len(r)} question(s) to {yaml_file}")
+
+
+@bank.command()
+@click.argument("yaml_file", type=click.Path(exists=True, dir_okay=False))
+@bank_option
+@threshold_option
+def check(yaml_file, bank_file, threshold):
+    """Check a quiz for questions that are near-duplicates of questions in the bank."""
+    n = _report_duplicates(yaml_file, bank_file, threshold)
+    click.echo(f"Found {n} possible duplicate(s)")
+    if n:
+        raise click.exceptions.Exit(1)
+
+
+@main.command()
+@click.argument("yaml_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("submissions", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--output",
+    "-o",
+    type=click.File("w"),
+    default="-",
+    help="Where to write the scores of every team in every round, as CSV (default: standard output).",
+)
+@click.option(
+    "--details",
+    type=click.File("w"),
+    default=None,
+    help="Write the verdict on every answer to this file, as CSV, e.g. to check the typos that were accepted.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=None,
+    help="The seed the sheets were made with, if any rounds are randomized.",
+)
+@click.option(
+    "--max-distance",
+    type=click.IntRange(min=0),
+    default=None,
+    help="The number of typos allowed in every answer (default: more for longer answers).",
+)
+def grade(yaml_file, submissions, output, details, seed, max_distance):
+    """Grade the typed answers of the teams against the answers of a pub quiz.
+
+    SUBMISSIONS is a CSV file (or a JSON lines file, if its name ends in .jsonl) with the columns team, round,
+    question and answer, and optionally variant. Questions may list other correct answers under alternates.
+    """
+    from pubquiz import grading
+    from pubquiz.quiz import Quiz
+
+    quiz = Quiz.from_yaml(yaml_file)
+    if seed is not None:
+        quiz.reseed(seed)
+    try:
+        scores = grading.grade(quiz, grading.read_submissions(submissions), max_distance, details)
+    except ValueError as e:
+        raise click.ClickException(f"{submissions}: {e}")
+    scores.write_csv(output)
+
+
+@main.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8090, show_default=True)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of quizzes to build in parallel (0 means one per CPU core).",
+)
+@click.option(
+    "--max-queued",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="Number of builds that may be queued at once; more are turned away until some finish.",
+)
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory in which to build the quizzes (default: a temporary directory).",
+)
+@image_dpi_option
+@precompile_option
+def serve(host, port, workers, max_queued, work_dir, image_dpi, precompile_header):
+    """Build pub quizzes on request, over HTTP.
+
+    POST a quiz yaml file to /builds to queue a build, then fetch /builds/<id> for its status and
+    /builds/<id>/<output>.pdf for the pdfs. Files referred to by the quizzes are looked up in the current
+    directory.
+    """
+    import tempfile
+
+    from pubquiz.serve import BuildServer, BuildService
+
+    with tempfile.TemporaryDirectory(prefix="pubquiz-serve-") as tmp:
+        service = BuildService(
+            ".",
+            work_dir or tmp,
+            workers=workers,
+            max_queued=max_queued,
+            image_dpi=image_dpi,
+            precompile=precompile_header,
+        )
+        server = BuildServer(service, host, port)
+        click.echo(
+            f"Serving builds at http://{host}:{server.server_address[1]}/builds (press Ctrl+C to stop)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.shutdown()
+
+
+@main.command()
+@click.argument("yaml_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8000, show_default=True)
+@click.option(
+    "--open", "open_browser", is_flag=True, default=False, help="Open the preview in a browser."
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write a self-contained HTML file instead of serving the preview.",
+)
+def preview(yaml_file, host, port, open_browser, output):
+    """Preview the slides of a pub quiz in a browser, without LaTeX.
+
+    The preview reloads whenever the yaml file or any picture it refers to changes.
+    """
+    from pubquiz import preview as html_preview
+
+    if output:
+        from pathlib import Path
+
+        from pubquiz.quiz import Quiz
+
+        Path(output).write_text(html_preview.to_html(Quiz.from_yaml(yaml_file)), encoding="utf-8")
+        click.echo(f"Wrote {output}")
+        return
+
+    server = html_preview.PreviewServer(yaml_file, host, port)
+    url = f"http://{host}:{server.server_address[1]}/"
+    click.echo(f"Previewing {yaml_file} at {url} (press Ctrl+C to stop)")
+    if open_browser:
+        import webbrowser
+
+        webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@main.command()
+@click.argument("yaml_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="Use 0.0.0.0 to let markers connect from other devices.",
+)
+@click.option("--port", type=int, default=8080, show_default=True)
+@click.option(
+    "--teams",
+    "teams_file",
+    type=click.File(),
+    default=None,
+    help="A file with the names of the teams, one per line, to show before they have any score.",
+)
+@click.option(
+    "--log",
+    "log_file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Append every score to this file, and replay the scores in it on start.",
+)
+def scoreboard(yaml_file, host, port, teams_file, log_file):
+    """Keep the scores of a pub quiz, with a live leaderboard.
+
+    Markers enter scores at /mark, and the leaderboard at / updates as soon as they do.
+    """
+    from pubquiz.quiz import Quiz
+    from pubquiz.scoreboard import Scoreboard, ScoreboardServer
+
+    quiz = Quiz.from_yaml(yaml_file)
+    teams = [line.strip() for line in teams_file if line.strip()] if teams_file else []
+    server = ScoreboardServer(Scoreboard([r.title for r in quiz], teams), quiz.title, log_file)
+    click.echo(
+        f"Leaderboard at http://{host}:{port}/, marking at http://{host}:{port}/mark (press Ctrl+C to stop)"
+    )
+    try:
+        server.run(host, port)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.group()
+def cache():
+    """Manage the cache of compiled pdfs."""
+
+
+def _size(ctx, param, value):
+    """Parse a size option (see :func:`pubquiz.cache.parse_size`)."""
+    from pubquiz.cache import parse_size
+
+    try:
+        size = parse_size(value)
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not a size such as 500M or 2G") from None
+    if size < 0:
+        raise click.BadParameter("the size cannot be negative")
+    return size
+
+
+@cache.command()
+@click.option(
+    "--max-size",
+    default="0",
+    show_default=True,
+    callback=_size,
+    help="Evict the least recently used pdfs until the cache is at most this size (e.g. 500M, 2G).",
+)
+def clean(max_size):
+    """Clean the cache of compiled pdfs."""
+    from pubquiz.cache import BuildCache
+
+    removed, freed = BuildCache().clean(max_size)
+    click.echo(f"Removed {removed} cached pdf(s), freeing {freed / (1 << 20):.1f} MB")
 
 
 if __name__ == "__main__":
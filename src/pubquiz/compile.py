@@ -0,0 +1,235 @@
+"""Module for compiling the generated LaTeX files with pdflatex."""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from pubquiz.cache import cache_dir, file_hash
+from pubquiz.timings import children_cpu_time
+from pubquiz.version import VERSION
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# The auxiliary files whose contents feed into the next pass
+aux_extensions = [".aux", ".toc", ".nav", ".snm", ".out"]
+
+rerun_regex = re.compile(r"Rerun to get|Please rerun|Label\(s\) may have changed")
+
+max_passes = 5
+
+
+@dataclass
+class CompileResult:
+    """Class representing the outcome of compiling a single LaTeX file."""
+
+    name: str
+    returncode: int
+    log: Path
+    pdf: Optional[Path] = None
+    passes: List[float] = field(default_factory=list)
+    # The CPU time used by pdflatex in every pass
+    cpu: List[float] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the compilation succeeded."""
+        return self.returncode == 0
+
+    @property
+    def duration(self) -> float:
+        """The total time spent in pdflatex, in seconds."""
+        return sum(self.passes)
+
+
+def _aux_hash(build_dir: Path, name: str) -> str:
+    """Hash the auxiliary files of a compile, to detect when another pass would change the output."""
+    sha = hashlib.sha256()
+    for ext in aux_extensions:
+        path = build_dir / (name + ext)
+        if path.exists():
+            sha.update(ext.encode() + path.read_bytes())
+    return sha.hexdigest()
+
+
+def needs_rerun(log: Path, aux_before: str, aux_after: str) -> bool:
+    """Decide whether another pdflatex pass is required.
+
+    :param log: the log file of the pass that just finished
+    :param aux_before: the hash of the auxiliary files before the pass
+    :param aux_after: the hash of the auxiliary files after the pass
+
+    :returns: True if the log asks for a rerun or the auxiliary files changed
+    """
+    if aux_before != aux_after:
+        return True
+    if log.exists():
+        return rerun_regex.search(log.read_text(errors="replace")) is not None
+    return False
+
+
+def _texinputs_env(texinputs: Sequence[PathLike]) -> Optional[dict]:
+    """Return the environment for running pdflatex with extra directories in TEXINPUTS."""
+    if not texinputs:
+        return None
+    # The trailing separator tells kpathsea to also search the default directories
+    paths = [str(Path(p).resolve()) for p in texinputs]
+    return dict(os.environ, TEXINPUTS=os.pathsep.join(paths + [os.environ.get("TEXINPUTS", "")]))
+
+
+@lru_cache(maxsize=None)
+def pdflatex_version() -> str:
+    """Return the version of pdflatex (formats are only valid for the exact version that dumped them)."""
+    try:
+        proc = subprocess.run(["pdflatex", "--version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return ""
+    return proc.stdout.split("\n")[0]
+
+
+def precompile_header(name: str, template_dir: PathLike = ".") -> Optional[Path]:
+    r"""Dump a precompiled format containing a header (i.e. the preamble of the sheets or slides).
+
+    Loading a format is much faster than processing the packages and theme in the header every time. The
+    generated documents only ``\input`` the header if it was not preloaded (see
+    :func:`pubquiz.quiz.input_header`). The format is cached, and only rebuilt when the header changes.
+
+    :param name: the name of the header (e.g. ``"sheets_header"``)
+    :param template_dir: the directory containing the header
+
+    :returns: the format file, or None if it could not be dumped (in which case compile without it)
+    """
+    header = Path(template_dir) / f"{name}.tex"
+    key = hashlib.sha256(f"{VERSION}:{pdflatex_version()}:{file_hash(header)}".encode()).hexdigest()
+    fmt = cache_dir() / "formats" / key / f"{name}.fmt"
+    if fmt.exists():
+        return fmt
+
+    fmt.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "dump.tex"
+        source.write_text("\\input{" + name + "}\n\\def\\pubquizheader{" + name + "}\n\\dump\n")
+        try:
+            proc = subprocess.run(
+                [
+                    "pdflatex",
+                    "-ini",
+                    "-interaction=nonstopmode",
+                    f"-jobname={name}",
+                    f"-output-directory={tmp}",
+                    "&pdflatex",
+                    source.name,
+                ],
+                cwd=tmp,
+                env=_texinputs_env([template_dir]),
+                stdout=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            return None
+        dumped = Path(tmp) / f"{name}.fmt"
+        if proc.returncode != 0 or not dumped.exists():
+            logger.warning(f"Could not precompile {header}; compiling without a format")
+            return None
+        # Move into place atomically, in case several builds dump the same format at once
+        fd, partial = tempfile.mkstemp(dir=fmt.parent, suffix=".tmp")
+        os.close(fd)
+        shutil.copy(dumped, partial)
+        os.replace(partial, fmt)
+    return fmt
+
+
+def compile_tex(
+    tex_file: PathLike,
+    build_dir: Optional[PathLike] = None,
+    texinputs: Sequence[PathLike] = (),
+    fmt: Optional[PathLike] = None,
+) -> CompileResult:
+    r"""Compile a LaTeX file with pdflatex in its own working directory.
+
+    pdflatex is rerun until the output reaches a fixed point, i.e. until the log no longer asks for a rerun and
+    the auxiliary files (which hold page references, overlays, footnote numbers, ...) stop changing. The
+    auxiliary files (``.aux``, ``.log``, ...) are written to ``build_dir`` so that several compiles can run
+    at the same time without clobbering one another. The resulting pdf is copied next to the LaTeX file.
+
+    :param tex_file: the LaTeX file to compile
+    :param build_dir: the directory for the auxiliary files (defaults to ``.pubquiz/<name>`` next to ``tex_file``)
+    :param texinputs: extra directories in which pdflatex should look for ``\input`` files and pictures
+    :param fmt: a precompiled format to load (see :func:`precompile_header`)
+
+    :returns: the outcome of the compilation
+    """
+    tex_file = Path(tex_file).resolve()
+    name = tex_file.stem
+    build_dir = Path(build_dir) if build_dir else tex_file.parent / ".pubquiz" / name
+    build_dir = build_dir.resolve()
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    cmd = ["pdflatex", "-interaction=nonstopmode", f"-output-directory={build_dir}", tex_file.name]
+    env = _texinputs_env(texinputs)
+    if fmt:
+        fmt = Path(fmt).resolve()
+        cmd.insert(1, f"-fmt={fmt.stem}")
+        env = dict(env or os.environ)
+        env["TEXFORMATS"] = os.pathsep.join([str(fmt.parent), os.environ.get("TEXFORMATS", "")])
+    log = build_dir / f"{name}.log"
+    passes: List[float] = []
+    cpu: List[float] = []
+    returncode = 0
+    while len(passes) < max_passes:
+        aux_before = _aux_hash(build_dir, name)
+        start, start_cpu = time.perf_counter(), children_cpu_time()
+        try:
+            proc = subprocess.run(cmd, cwd=tex_file.parent, env=env, stdout=subprocess.DEVNULL)
+            returncode = proc.returncode
+        except FileNotFoundError:
+            # pdflatex is not installed
+            returncode = 127
+        passes.append(time.perf_counter() - start)
+        cpu.append(children_cpu_time() - start_cpu)
+
+        # Stop on errors, or once we have reached a fixed point
+        if returncode != 0 or not needs_rerun(log, aux_before, _aux_hash(build_dir, name)):
+            break
+
+    pdf = None
+    if (build_dir / f"{name}.pdf").exists():
+        pdf = tex_file.with_suffix(".pdf")
+        shutil.copy(build_dir / f"{name}.pdf", pdf)
+
+    return CompileResult(name=name, returncode=returncode, log=log, pdf=pdf, passes=passes, cpu=cpu)
+
+
+def compile_all(
+    tex_files: Sequence[PathLike],
+    jobs: int = 1,
+    texinputs: Sequence[PathLike] = (),
+    formats: Optional[Sequence[Optional[PathLike]]] = None,
+) -> List[CompileResult]:
+    r"""Compile several independent LaTeX files, optionally in parallel.
+
+    :param tex_files: the LaTeX files to compile
+    :param jobs: the maximum number of files to compile at once (0 means one per CPU core)
+    :param texinputs: extra directories in which pdflatex should look for ``\input`` files and pictures
+    :param formats: the precompiled format to load for each file (if any)
+
+    :returns: the outcome of each compilation, in the same order as ``tex_files``
+    """
+    jobs = jobs or os.cpu_count() or 1
+    args = (tex_files, repeat(None), repeat(texinputs), formats or repeat(None))
+    if jobs <= 1 or len(tex_files) <= 1:
+        return list(map(compile_tex, *args))
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tex_files))) as executor:
+        return list(executor.map(compile_tex, *args))
@@ -0,0 +1,110 @@
+"""Module for detecting near-duplicate questions with MinHash signatures and locality-sensitive hashing.
+
+Every question is reduced to the set of character shingles of its (normalised) question and answer text. The
+MinHash signature of that set estimates the Jaccard similarity between any two questions, and splitting the
+signature into bands gives bucket keys under which similar questions are likely to collide. Looking up the
+buckets of a new question then finds its near-duplicates without comparing it to every other question.
+
+The signatures are computed with numpy when it is installed (``pip install pubquiz[dedup]``), and in pure
+Python otherwise; both give the same signatures.
+"""
+
+import hashlib
+import re
+import struct
+import zlib
+from types import ModuleType
+from typing import List, Optional, Sequence, Set
+
+np: Optional[ModuleType]
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# The length of the shingles, in characters
+shingle_length = 4
+
+# The number of hash functions in a signature, and how they are split into bands for the LSH. With 16 bands of
+# 4 rows, questions with a similarity of 0.5 are found with a probability of about 2/3, and 0.7 with 0.99.
+num_perm = 64
+bands = 16
+rows = num_perm // bands
+
+# The hash functions are h(x) = (a x + b) mod p, with a < 2^31 so that a x fits in 64 bits
+_prime = 4294967311
+_a = [
+    int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:4], "big") >> 1
+    for i in range(num_perm)
+]
+_b = [int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:4], "big") for i in range(num_perm)]
+if np is not None:
+    _a_array = np.array(_a, dtype=np.uint64)[:, None]
+    _b_array = np.array(_b, dtype=np.uint64)[:, None]
+
+_latex_regex = re.compile(r"\\[a-zA-Z]+\*?|[{}$&~^_\\]")
+_punctuation_regex = re.compile(r"[^\w\s]")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Normalise text for comparison: drop LaTeX commands, punctuation, case and repeated whitespace."""
+    text = _latex_regex.sub(" ", str(text or ""))
+    text = _punctuation_regex.sub("", text.lower())
+    return " ".join(text.split())
+
+
+def shingles(question: Optional[str], answer: Optional[str]) -> Set[int]:
+    """Hash the character shingles of the question and answer of a question.
+
+    The shingles of the answer are kept apart from those of the question, so that the same text in the question
+    of one and the answer of another does not count.
+    """
+    hashes = set()
+    for prefix, text in (("q", normalize(question)), ("a", normalize(answer))):
+        text = f" {text} "
+        for i in range(max(1, len(text) - shingle_length + 1)):
+            hashes.add(zlib.crc32((prefix + text[i : i + shingle_length]).encode()))
+    return hashes
+
+
+def signature(question: Optional[str], answer: Optional[str]) -> List[int]:
+    """Compute the MinHash signature of a question."""
+    hashes = sorted(shingles(question, answer))
+    if np is not None:
+        x = np.array(hashes, dtype=np.uint64)
+        return ((_a_array * x + _b_array) % np.uint64(_prime)).min(axis=1).tolist()
+    return [min([(a * x + b) % _prime for x in hashes]) for a, b in zip(_a, _b)]
+
+
+def band_keys(sig: Sequence[int]) -> List[int]:
+    """Compute the LSH bucket of every band of a signature (as signed 64-bit integers, to fit in SQLite)."""
+    keys = []
+    for i in range(bands):
+        band = struct.pack(f"<{rows}Q", *sig[i * rows : (i + 1) * rows])
+        keys.append(
+            int.from_bytes(hashlib.blake2b(band, digest_size=8).digest(), "big", signed=True)
+        )
+    return keys
+
+
+def pack(sig: Sequence[int]) -> bytes:
+    """Serialize a signature."""
+    return struct.pack(f"<{num_perm}Q", *sig)
+
+
+def unpack(data: bytes) -> List[int]:
+    """Deserialize a signature."""
+    return list(struct.unpack(f"<{num_perm}Q", data))
+
+
+def similarity(sig1: Sequence[int], sig2: Sequence[int]) -> float:
+    """Estimate the Jaccard similarity of two questions from their signatures."""
+    return sum(x == y for x, y in zip(sig1, sig2)) / num_perm
+
+
+def similarities(sig: Sequence[int], packed: Sequence[bytes]) -> List[float]:
+    """Estimate the similarity of a question to many others at once, from their packed signatures."""
+    if np is not None and packed:
+        others = np.frombuffer(b"".join(packed), dtype="<u8").reshape(len(packed), num_perm)
+        return (others == np.array(sig, dtype=np.uint64)).mean(axis=1).tolist()
+    return [similarity(sig, unpack(p)) for p in packed]
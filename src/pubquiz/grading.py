@@ -0,0 +1,310 @@
+"""Module for grading typed answers (e.g. of an online quiz) against the answers of a quiz.
+
+Run with ``pubquiz grade QUIZ.yaml SUBMISSIONS`` (see ``pubquiz grade --help``). The submissions are a CSV or
+JSON lines file with a ``team``, ``round`` (its number or title), ``question`` (its number within the round) and
+``answer`` for every answer, and optionally the ``variant`` of the sheets the team got (A, B, ... or 1, 2, ...).
+
+An answer is correct if, once normalised (see :func:`normalize_answer`), it is within a few typos of the answer
+of the question or one of its ``alternates``. The longer the answer, the more typos are allowed, but numbers
+must always match exactly.
+"""
+
+import csv
+import json
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Union
+
+from pubquiz import dedup
+from pubquiz.paths import DirectoryCache
+from pubquiz.question import Question, input_regex
+from pubquiz.quiz import Quiz
+
+PathLike = Union[str, Path]
+
+logger = logging.getLogger(__name__)
+
+_article_regex = re.compile(r"^(?:the|a|an) ")
+_digits_regex = re.compile(r"\d+")
+
+
+def normalize_answer(text: Optional[str]) -> str:
+    """Normalise an answer: drop accents and leading articles, as well as what :func:`dedup.normalize` drops."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _article_regex.sub("", dedup.normalize(text.casefold()))
+
+
+def allowed_distance(answer: str) -> int:
+    """Return the number of typos allowed in an answer: one per 5 characters, up to 3."""
+    return min(3, len(answer) // 5)
+
+
+def edit_distance(a: str, b: str, bound: int) -> int:
+    """Compute the Levenshtein distance between two strings, giving up once it exceeds ``bound``.
+
+    Only the diagonal band of width ``2 * bound + 1`` of the usual table is filled in, so this takes
+    ``O(bound * len(a))`` time rather than ``O(len(a) * len(b))``.
+
+    :returns: the distance, or ``bound + 1`` if it is larger than ``bound``
+    """
+    too_far = bound + 1
+    if abs(len(a) - len(b)) > bound:
+        return too_far
+    previous = [j if j <= bound else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= bound else too_far] + [too_far] * len(b)
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+                too_far,
+            )
+        if min(current[low - 1 : high + 1]) > bound:
+            return too_far
+        previous = current
+    return previous[len(b)]
+
+
+class AnswerKey:
+    """Class for matching answers against the accepted answers of one question.
+
+    The accepted answers are normalised once, and the verdict on every distinct (normalised) answer is
+    remembered, as many teams give the same answer.
+    """
+
+    def __init__(self, answers: Iterable[Optional[str]]):
+        """Initialize the key.
+
+        :param answers: the accepted answers
+        """
+        self.accepted = {normalize_answer(a): str(a) for a in answers if a}
+        # Numbers have to match exactly, so only compare answers with the same numbers in them
+        self._digits = {a: _digits_regex.findall(a) for a in self.accepted}
+        self._verdicts: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_question(
+        cls, question: Question, directories: Optional[DirectoryCache] = None
+    ) -> "AnswerKey":
+        r"""Create the key for a question, accepting its answer and its alternates.
+
+        An answer kept in a file (see :meth:`Question.resolve_paths`) is read, so that the answers given are
+        compared with its contents rather than with the name of the file.
+
+        :param question: the question
+        :param directories: the directory cache for resolving the paths of all the questions of the quiz
+        """
+        question.resolve_paths(directories)
+        answer: Optional[str] = question.answer
+        inputs = input_regex.fullmatch(answer.strip()) if isinstance(answer, str) else None
+        if inputs:
+            try:
+                answer = Path(inputs.group(1)).read_text(encoding="utf-8")
+            except OSError as e:
+                logger.warning(
+                    f"Could not read the answer of {question.question!r}, so it is not accepted: {e}"
+                )
+                answer = None
+        return cls([answer] + list(question.alternates or []))
+
+    def match(self, answer: Optional[str], max_distance: Optional[int] = None) -> Optional[str]:
+        """Find the accepted answer that an answer matches, if any.
+
+        :param answer: the answer given
+        :param max_distance: the number of typos allowed (defaults to :func:`allowed_distance`)
+        """
+        normalized = normalize_answer(answer)
+        key = normalized if max_distance is None else f"{max_distance}:{normalized}"
+        if key in self._verdicts:
+            return self._verdicts[key]
+
+        verdict = self.accepted.get(normalized)
+        if verdict is None and normalized:
+            digits = _digits_regex.findall(normalized)
+            best = None
+            for accepted, original in self.accepted.items():
+                bound = allowed_distance(accepted) if max_distance is None else max_distance
+                if bound == 0 or self._digits[accepted] != digits:
+                    continue
+                distance = edit_distance(normalized, accepted, bound)
+                if distance <= bound and (best is None or distance < best):
+                    best, verdict = distance, original
+        self._verdicts[key] = verdict
+        return verdict
+
+
+@dataclass
+class Grade:
+    """Class representing the verdict on one submitted answer."""
+
+    team: str
+    round: int
+    question: int
+    answer: str
+    # The accepted answer it matched, if it is correct
+    match: Optional[str]
+
+    @property
+    def correct(self) -> bool:
+        """Whether the answer is correct."""
+        return self.match is not None
+
+
+def variant_index(label: Optional[str]) -> Optional[int]:
+    """Find the index of a variant from its label (A, B, ..., Z, AA, ... as on the sheets, or 1, 2, ...).
+
+    :returns: the index, or None if there is no label (the sheets were printed without variants)
+    """
+    label = str(label or "").strip().upper()
+    if not label:
+        return None
+    if label.isdigit() and int(label) > 0:
+        return int(label) - 1
+    if not ("A" <= min(label) and max(label) <= "Z"):
+        raise ValueError(f"Invalid variant {label!r}")
+    index = 0
+    for char in label:
+        index = index * 26 + ord(char) - ord("A") + 1
+    return index - 1
+
+
+class Grader:
+    """Class for grading answers against the questions of a quiz."""
+
+    def __init__(self, quiz: Quiz, max_distance: Optional[int] = None):
+        """Initialize the grader.
+
+        :param quiz: the quiz (with the seed that was used to print the sheets, if any rounds are randomized)
+        :param max_distance: the number of typos allowed in every answer (defaults to :func:`allowed_distance`)
+        """
+        self.quiz = quiz
+        self.rounds = [r.title for r in quiz]
+        self.max_distance = max_distance
+        # The key of every question of every variant, by position, created as the variants are needed. The keys
+        # are shared between variants, so that each question is only normalised once.
+        self._by_question: Dict[int, AnswerKey] = {}
+        self._directories = DirectoryCache()
+        self._keys: Dict[Optional[int], List[List[AnswerKey]]] = {}
+
+    def _variant_keys(self, variant: Optional[int]) -> List[List[AnswerKey]]:
+        """Get the keys of a variant, in the order of its sheets (see :meth:`Quiz.iter_sheets`).
+
+        Only the rounds solved in the teams' own time differ between variants; the others are in the order of the
+        slides (see :meth:`Quiz.variant`).
+        """
+        if variant not in self._keys:
+            quiz = self.quiz if variant is None else self.quiz.variant(variant)
+            for q in (q for r in quiz for q in r):
+                if id(q) not in self._by_question:
+                    self._by_question[id(q)] = AnswerKey.from_question(q, self._directories)
+            self._keys[variant] = [[self._by_question[id(q)] for q in r] for r in quiz]
+        return self._keys[variant]
+
+    def round_index(self, key: Union[int, str]) -> int:
+        """Find a round by its number (starting at 1) or its title."""
+        if isinstance(key, str) and key.strip() in self.rounds:
+            return self.rounds.index(key.strip())
+        try:
+            index = int(key) - 1
+        except (TypeError, ValueError):
+            raise ValueError(f"There is no round {key!r}") from None
+        if not 0 <= index < len(self.rounds):
+            raise ValueError(f"There is no round {key!r}")
+        return index
+
+    def grade(self, submission: Dict[str, str]) -> Grade:
+        """Grade a submitted answer (a dictionary with a team, round, question, answer and optionally variant)."""
+        round_index = self.round_index(submission["round"])
+        keys = self._variant_keys(variant_index(submission.get("variant")))[round_index]
+        try:
+            question_index = int(submission["question"]) - 1
+        except (TypeError, ValueError):
+            question_index = -1
+        if not 0 <= question_index < len(keys):
+            raise ValueError(
+                f"There is no question {submission['question']!r} in round {round_index + 1}"
+            )
+        answer = str(submission.get("answer") or "")
+        match = keys[question_index].match(answer, self.max_distance)
+        return Grade(str(submission["team"]).strip(), round_index, question_index, answer, match)
+
+    def grade_all(self, submissions: Iterable[Dict[str, str]]) -> Iterator[Grade]:
+        """Grade a stream of submitted answers."""
+        for line, submission in enumerate(submissions, 1):
+            try:
+                yield self.grade(submission)
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"Submission {line}: {e}") from None
+
+
+def read_submissions(path: PathLike) -> Iterator[Dict[str, str]]:
+    """Read the submitted answers from a CSV file, or a JSON lines file (if its name ends in ``.jsonl``)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if Path(path).suffix.lower() in (".jsonl", ".ndjson"):
+            yield from (json.loads(line) for line in f if line.strip())
+        else:
+            yield from csv.DictReader(f)
+
+
+class Scores:
+    """Class for adding up the points of every team in every round."""
+
+    def __init__(self, rounds: List[str]):
+        """Initialize the scores.
+
+        :param rounds: the titles of the rounds
+        """
+        self.rounds = rounds
+        self.scores: Dict[str, List[float]] = {}
+
+    def add(self, grade: Grade, points: float = 1.0):
+        """Add the points for an answer (if it is correct)."""
+        scores = self.scores.get(grade.team)
+        if scores is None:
+            scores = self.scores[grade.team] = [0.0] * len(self.rounds)
+        if grade.correct:
+            scores[grade.round] += points
+
+    def write_csv(self, f: IO[str]):
+        """Write the scores as CSV, from the highest total to the lowest."""
+        writer = csv.writer(f)
+        writer.writerow(["team"] + self.rounds + ["total"])
+        totals = {team: sum(scores) for team, scores in self.scores.items()}
+        for team in sorted(self.scores, key=lambda t: (-totals[t], t.lower())):
+            writer.writerow([team] + [f"{s:g}" for s in self.scores[team]] + [f"{totals[team]:g}"])
+
+
+def grade(
+    quiz: Quiz,
+    submissions: Iterable[Dict[str, str]],
+    max_distance: Optional[int] = None,
+    details: Optional[IO[str]] = None,
+) -> Scores:
+    """Grade all the submitted answers, in one pass.
+
+    :param quiz: the quiz
+    :param submissions: the submitted answers (see :func:`read_submissions`)
+    :param max_distance: the number of typos allowed in every answer (defaults to :func:`allowed_distance`)
+    :param details: a file to write the verdict on every answer to, as CSV (e.g. to check the typos that were
+        accepted)
+
+    :returns: the scores of every team in every round
+    """
+    grader = Grader(quiz, max_distance)
+    scores = Scores(grader.rounds)
+    writer = csv.writer(details) if details else None
+    if writer:
+        writer.writerow(["team", "round", "question", "answer", "correct", "match"])
+    for g in grader.grade_all(submissions):
+        scores.add(g)
+        if writer:
+            writer.writerow(
+                [g.team, g.round + 1, g.question + 1, g.answer, int(g.correct), g.match or ""]
+            )
+    return scores
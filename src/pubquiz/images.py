@@ -0,0 +1,133 @@
+"""Module for downsampling the pictures of a quiz to the resolution that the slides actually need.
+
+This requires `Pillow <https://python-pillow.org>`_ (``pip install pubquiz[images]``).
+"""
+
+import dataclasses
+import hashlib
+import logging
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy as shallow_copy
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from pubquiz.cache import cache_dir, file_hash, find_file
+from pubquiz.question import Question
+from pubquiz.quiz import Quiz
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# The height of the slides (beamer with aspectratio=169 is 16cm x 9cm)
+slides_height_inches = 9 / 2.54
+
+jpeg_quality = 85
+
+
+def images_dir() -> Path:
+    """Return the directory where the downsampled pictures are cached."""
+    return cache_dir() / "images"
+
+
+def prepare_image(path: PathLike, height: float, dpi: int = 150) -> Path:
+    r"""Downsample and recompress a picture for display at ``height`` times the height of the slides.
+
+    The result is cached on the content of the picture and the target resolution, so it is reused across
+    builds (and across quizzes that share a picture).
+
+    :param path: the picture
+    :param height: the height of the picture, as a fraction of ``\paperheight``
+    :param dpi: the resolution of the slides, in dots per inch
+
+    :returns: the downsampled picture, or the original if it is already small enough (or not a bitmap)
+    """
+    from PIL import Image
+
+    source = find_file(path)
+    if source is None or source.suffix.lower() not in (".png", ".jpg", ".jpeg"):
+        return Path(path)
+
+    target = math.ceil(height * slides_height_inches * dpi)
+    ext = ".png" if source.suffix.lower() == ".png" else ".jpg"
+    key = hashlib.sha256(f"{file_hash(source)}:{target}:{jpeg_quality}".encode()).hexdigest()
+    prepared = images_dir() / f"{key}{ext}"
+    # Marks a picture that is already small enough, so that it is not decoded again on every build
+    unchanged = images_dir() / f"{key}.unchanged"
+    if prepared.exists():
+        return prepared
+    if unchanged.exists():
+        return Path(path)
+
+    # Image.Resampling is new in Pillow 9.1
+    resample = getattr(Image, "Resampling", Image).LANCZOS
+    with Image.open(source) as im:
+        if im.height <= target:
+            images_dir().mkdir(parents=True, exist_ok=True)
+            unchanged.touch()
+            return Path(path)
+        resized = im.resize((max(1, round(im.width * target / im.height)), target), resample)
+
+    images_dir().mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=images_dir(), suffix=ext)
+    with os.fdopen(fd, "wb") as f:
+        if ext == ".png":
+            resized.save(f, format="PNG", optimize=True)
+        else:
+            resized.convert("RGB").save(f, format="JPEG", quality=jpeg_quality, optimize=True)
+    os.replace(tmp, prepared)
+    return prepared
+
+
+def prepare_images(quiz: Quiz, dpi: int = 150, jobs: Optional[int] = None) -> Quiz:
+    """Downsample all the pictures of a quiz to the resolution they are displayed at.
+
+    The quiz itself is left alone, so that it still refers to the original pictures (which is what
+    :class:`pubquiz.watch.Watcher` watches). Only the rounds with pictures that were replaced are copied.
+
+    :param quiz: the quiz
+    :param dpi: the resolution of the slides, in dots per inch
+    :param jobs: the number of pictures to process in parallel (defaults to one per CPU core)
+
+    :returns: a copy of the quiz that refers to the downsampled pictures (or the quiz itself if Pillow is not
+        installed)
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        logger.warning("Pillow is not installed, so the pictures will not be downsampled")
+        return quiz
+
+    attrs = [("question_pic", "question_pic_height"), ("answer_pic", "answer_pic_height")]
+    todo: Set[Tuple[str, float]] = set()
+    for r in quiz:
+        for q in r:
+            for pic, height in attrs:
+                path = getattr(q, pic)
+                # Skip pictures that have already been prepared
+                if path and Path(path).parent != images_dir():
+                    todo.add((str(path), getattr(q, height)))
+
+    # Pillow releases the GIL while resizing, so threads are enough to use all the cores
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {key: executor.submit(prepare_image, *key, dpi) for key in todo}
+        prepared = {key: str(f.result()) for key, f in futures.items()}
+
+    def replace(q: Question) -> Question:
+        changes: Dict[str, Any] = {}
+        for pic, height in attrs:
+            key = (str(getattr(q, pic)), getattr(q, height))
+            if prepared.get(key, key[0]) != key[0]:
+                changes[pic] = prepared[key]
+        return dataclasses.replace(q, **changes) if changes else q
+
+    replaced = {id(q): replace(q) for r in quiz for q in r}
+    copied = shallow_copy(quiz)
+    copied.data = [
+        r if all(replaced[id(q)] is q for q in r) else r.map_questions(lambda q: replaced[id(q)])
+        for r in quiz
+    ]
+    return copied
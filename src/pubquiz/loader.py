@@ -0,0 +1,74 @@
+"""Module for loading quiz yaml files, with an on-disk cache of the parsed contents."""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from yaml import load
+
+from pubquiz.cache import cache_dir
+from pubquiz.timings import stage
+from pubquiz.version import VERSION
+
+try:
+    # The libyaml bindings are much faster than the pure-Python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
+
+PathLike = Union[str, Path]
+
+
+def _cache_file(filename: Path) -> Path:
+    """Return the location of the cached contents of a yaml file."""
+    return (
+        cache_dir() / "quizzes" / (hashlib.sha256(str(filename).encode()).hexdigest() + ".pickle")
+    )
+
+
+def load_yaml(filename: PathLike, use_cache: bool = True) -> Dict[str, Any]:
+    """Load a quiz yaml file.
+
+    The parsed contents are cached on disk, keyed on the path, modification time and size of the file, so that
+    loading an unchanged file again skips the yaml parsing altogether.
+
+    :param filename: the yaml file to load
+    :param use_cache: if False, always parse the file (and do not update the cache)
+
+    :returns: the contents of the yaml file
+    """
+    filename = Path(filename).resolve()
+    stat = os.stat(filename)
+    stamp = (VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_file = _cache_file(filename)
+
+    if use_cache and cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                cached_stamp, dct = pickle.load(f)
+            if cached_stamp == stamp:
+                return dct
+        except Exception:  # noqa: B902
+            # A corrupt or outdated cache file; fall back to parsing the yaml
+            pass
+
+    with open(filename, "r") as f, stage("parse yaml"):
+        dct = load(f, Loader=SafeLoader)
+
+    if use_cache:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((stamp, dct), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+
+    return dct
+
+
+def parse_yaml(text: str) -> Any:
+    """Parse the contents of a quiz yaml file that is not on disk (e.g. one that was uploaded)."""
+    with stage("parse yaml"):
+        return load(text, Loader=SafeLoader)
@@ -0,0 +1,35 @@
+"""Module for checking whether files exist without statting each of them separately."""
+
+import os
+from pathlib import Path
+from typing import Dict, FrozenSet, Union
+
+PathLike = Union[str, Path]
+
+
+class DirectoryCache:
+    """Class that checks for the existence of files using cached directory listings.
+
+    Checking any number of files in the same directory lists that directory only once. This matters when
+    loading large quizzes from networked file systems, where every stat is a round trip.
+    """
+
+    def __init__(self):
+        """Initialize the cache."""
+        self._listings: Dict[Path, FrozenSet[str]] = {}
+
+    def listing(self, directory: Path) -> FrozenSet[str]:
+        """Return the names of the entries in ``directory`` (empty if it does not exist)."""
+        if directory not in self._listings:
+            try:
+                self._listings[directory] = frozenset(os.listdir(directory))
+            except (OSError, ValueError):
+                self._listings[directory] = frozenset()
+        return self._listings[directory]
+
+    def exists(self, path: PathLike) -> bool:
+        """Check whether ``path`` exists."""
+        path = Path(path)
+        if path.name in ("", ".", ".."):
+            return path.exists()
+        return path.name in self.listing(path.parent)
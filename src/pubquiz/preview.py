@@ -0,0 +1,269 @@
+"""Module for previewing the slides of a quiz as HTML, without going through LaTeX.
+
+The HTML deck has the same structure as the LaTeX slides (see :meth:`pubquiz.round.Round.iter_slides`): a header
+slide for every round, the questions, and then the questions again with the answers revealed on click. Only the
+most common LaTeX markup in questions and answers is translated; the preview is meant for checking the content
+of a quiz, not its typesetting.
+"""
+
+import base64
+import html
+import mimetypes
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+from urllib.parse import quote, unquote
+
+from pubquiz.cache import find_file
+from pubquiz.question import Question
+from pubquiz.quiz import Quiz
+
+PathLike = Union[str, Path]
+
+_style = """
+html, body { margin: 0; height: 100%; background: #222; font-family: sans-serif; }
+section { box-sizing: border-box; width: 100vw; height: 100vh; padding: 4vh 6vw; background: white;
+    display: flex; flex-direction: column; align-items: center; justify-content: center; text-align: center;
+    font-size: 4vh; }
+section.header { font-size: 8vh; }
+section img { max-width: 90vw; object-fit: contain; margin-top: 1vh; }
+.answer { font-style: italic; margin-top: 2vh; }
+.credit { position: absolute; bottom: 1vh; left: 2vw; font-size: 1.5vh; color: #666; }
+.custom { color: #a00; font-family: monospace; }
+.error { color: #a00; font-family: monospace; white-space: pre-wrap; text-align: left; }
+"""
+
+# Slides advance on click, space and the arrow keys. Elements with data-step="n" appear at the n-th step of a
+# slide, and elements with data-until="n" disappear at it (like \\onslide and \\only in beamer).
+_script = """
+const slides = Array.from(document.querySelectorAll("section"));
+let i = 0, s = 0;
+const m = location.hash.match(/^#(\\d+)\\.(\\d+)$/);
+if (m) { i = Math.min(+m[1], slides.length - 1); s = +m[2]; }
+function steps() { return +(slides[i].dataset.steps || 0); }
+function show() {
+    slides.forEach((el, k) => { el.hidden = k !== i; });
+    slides[i].querySelectorAll("[data-step]").forEach(
+        (el) => { el.style.visibility = s >= +el.dataset.step ? "visible" : "hidden"; });
+    slides[i].querySelectorAll("[data-until]").forEach((el) => { el.hidden = s >= +el.dataset.until; });
+    history.replaceState(null, "", "#" + i + "." + s);
+}
+function next() { if (s < steps()) { s++; } else if (i < slides.length - 1) { i++; s = 0; } show(); }
+function prev() { if (s > 0) { s--; } else if (i > 0) { i--; s = steps(); } show(); }
+document.addEventListener("keydown", (e) => {
+    if (["ArrowRight", "ArrowDown", "PageDown", " ", "Enter"].includes(e.key)) next();
+    else if (["ArrowLeft", "ArrowUp", "PageUp", "Backspace"].includes(e.key)) prev();
+});
+document.addEventListener("click", next);
+show();
+"""
+
+# Injected by the preview server: reload the page (on the same slide) whenever the quiz changes
+_reload_script = """
+let version = null;
+setInterval(async () => {
+    try {
+        const v = await (await fetch("/version")).text();
+        if (version !== null && v !== version) location.reload();
+        version = v;
+    } catch (e) {}
+}, 500);
+"""
+
+# The LaTeX markup that is translated, as (pattern, replacement) pairs applied to the HTML-escaped text
+_latex_markup = [
+    (re.compile(r"\\(?:textit|emph)\{([^{}]*)\}"), r"<i>\1</i>"),
+    (re.compile(r"\\textbf\{([^{}]*)\}"), r"<b>\1</b>"),
+    (re.compile(r"\\underline\{([^{}]*)\}"), r"<u>\1</u>"),
+    (re.compile(r"\\\\"), "<br>"),
+    (re.compile(r"---"), "&mdash;"),
+    (re.compile(r"--"), "&ndash;"),
+    (re.compile(r"(?<!\\)~"), "&nbsp;"),
+    (re.compile(r"``|''"), "&quot;"),
+    (re.compile(r"\\([&%$#_{}])"), r"\1"),
+    # Drop any other command, keeping its argument
+    (re.compile(r"\\[a-zA-Z]+\*?(?:\[[^\]]*\])?\{([^{}]*)\}"), r"\1"),
+]
+
+_input_regex = re.compile(r"\\input\{([^}]*)\}")
+
+
+def latex_to_html(text: Optional[str]) -> str:
+    """Translate a question or answer from LaTeX to HTML (only the common markup; the rest is left as is)."""
+    text = html.escape(str(text or ""), quote=False)
+    for pattern, replacement in _latex_markup:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def picture_url(path: PathLike, embed: bool = True) -> str:
+    """Return the URL of a picture: either a data URL with its contents, or a link to the preview server."""
+    found = find_file(path)
+    if found is None:
+        return quote(str(path))
+    if not embed:
+        return "/files" + quote(found.resolve().as_posix())
+    mime = mimetypes.guess_type(str(found))[0] or "application/octet-stream"
+    return f"data:{mime};base64," + base64.b64encode(found.read_bytes()).decode()
+
+
+def _picture(path: PathLike, height: float, embed: bool, attrs: str = "") -> str:
+    r"""Generate an ``<img>`` tag for a picture, sized like ``\includegraphics[height=...\paperheight]``."""
+    return f'<img src="{picture_url(path, embed)}" style="height: {height * 100:.0f}vh"{attrs}>'
+
+
+def question_slide(q: Question, index: int, with_answer: bool = False, embed: bool = True) -> str:
+    """Generate the HTML for the slide of a question (compare :meth:`Question.to_slide`).
+
+    With the answer, the slide has a second step that reveals it, and swaps the picture of the question for that
+    of the answer.
+    """
+    q.resolve_paths()
+    custom = q.answer_slide if with_answer else q.question_slide
+    if custom:
+        files = ", ".join(_input_regex.findall(str(custom))) or str(custom)
+        return f'<section><p class="custom">Custom slide: {html.escape(files)}</p></section>'
+
+    lines = [f'<section data-steps="{1 if with_answer else 0}">']
+    lines.append(f"<p>{index}. {latex_to_html(q.question)}</p>")
+    if q.question_pic:
+        until = ' data-until="1"' if with_answer and q.answer_pic else ""
+        lines.append(_picture(q.question_pic, q.question_pic_height, embed, until))
+        if q.question_pic_credit:
+            lines.append(
+                f'<p class="credit">photo credit: {latex_to_html(q.question_pic_credit)}</p>'
+            )
+    if with_answer:
+        if q.answer_pic:
+            lines.append(_picture(q.answer_pic, q.answer_pic_height, embed, ' data-step="1"'))
+        if q.answer:
+            lines.append(f'<p class="answer" data-step="1">{latex_to_html(q.answer)}</p>')
+    lines.append("</section>")
+    return "\n".join(lines)
+
+
+def header_slide(header: str) -> str:
+    """Generate the HTML for a header slide (compare :func:`pubquiz.slides.header_slide`)."""
+    return f'<section class="header"><h1>{latex_to_html(header)}</h1></section>'
+
+
+def iter_html(quiz: Quiz, embed: bool = True, reload: bool = False) -> Iterator[str]:
+    """Generate the HTML deck for the slides of a quiz, one chunk at a time.
+
+    :param quiz: the quiz
+    :param embed: if True, embed the pictures in the HTML so that it is self-contained; otherwise link to them
+        on the preview server
+    :param reload: if True, include the script that reloads the page when the preview server reports changes
+    """
+    yield "<!DOCTYPE html>"
+    yield f'<html><head><meta charset="utf-8"><title>{html.escape(str(quiz.title))}</title>'
+    yield f"<style>{_style}</style></head><body>"
+
+    yield (
+        f'<section class="header"><h1>{latex_to_html(quiz.title)}</h1>'
+        f"<p>{latex_to_html(quiz.author)}</p></section>"
+    )
+    for index, r in enumerate(quiz):
+        heading = r.title if ":" in r.title else f"Round {index + 1}: {r.title}"
+        yield header_slide(heading)
+        if not r.solve_in_own_time:
+            yield from (question_slide(q, iq + 1, embed=embed) for iq, q in enumerate(r))
+            yield header_slide("Answers")
+        yield from (question_slide(q, iq + 1, True, embed) for iq, q in enumerate(r))
+
+    yield f"<script>{_script}</script>"
+    if reload:
+        yield f"<script>{_reload_script}</script>"
+    yield "</body></html>"
+
+
+def to_html(quiz: Quiz, embed: bool = True) -> str:
+    """Generate a self-contained HTML deck for the slides of a quiz (see :func:`iter_html`)."""
+    return "\n".join(iter_html(quiz, embed=embed))
+
+
+def error_page(message: str) -> str:
+    """Generate a page showing an error (e.g. a typo in the yaml file), which reloads once it is fixed."""
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><style>{_style}</style></head><body>'
+        f'<section><p class="error">{html.escape(message)}</p></section>'
+        f"<script>{_reload_script}</script></body></html>"
+    )
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """Class for serving a live preview of a quiz, which reloads whenever the quiz changes."""
+
+    daemon_threads = True
+
+    def __init__(self, yaml_file: PathLike, host: str = "127.0.0.1", port: int = 8000):
+        """Initialize the server (use port 0 to pick any free port)."""
+        super().__init__((host, port), _PreviewHandler)
+        self.yaml_file = Path(yaml_file).resolve()
+        self._files: List[Path] = []
+        self._lock = threading.Lock()
+
+    def render(self) -> str:
+        """Render the preview, remembering which files it uses."""
+        with self._lock:
+            cwd = os.getcwd()
+            try:
+                # The files referred to by the quiz are relative to its yaml file
+                os.chdir(self.yaml_file.parent)
+                quiz = Quiz.from_yaml(self.yaml_file)
+                html_text = "\n".join(iter_html(quiz, embed=False, reload=True))
+                files = [find_file(f) for r in quiz for f in r.referenced_files()]
+                self._files = [f.resolve() for f in files if f is not None]
+            finally:
+                os.chdir(cwd)
+        return html_text
+
+    def version(self) -> str:
+        """Identify the current state of the yaml file and the files it refers to."""
+        stamps = []
+        for path in [self.yaml_file] + self._files:
+            try:
+                stamps.append(str(os.stat(path).st_mtime_ns))
+            except OSError:
+                stamps.append("missing")
+        return "-".join(stamps)
+
+    def is_served(self, path: Path) -> bool:
+        """Whether a file may be served: only the files that the quiz refers to are."""
+        return path.resolve() in self._files
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    server: PreviewServer
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            try:
+                body = self.server.render()
+            except Exception as e:  # noqa: B902
+                body = error_page(f"{type(e).__name__}: {e}")
+            self._send(200, "text/html; charset=utf-8", body.encode())
+        elif path == "/version":
+            self._send(200, "text/plain", self.server.version().encode())
+        elif path.startswith("/files/") and self.server.is_served(Path(unquote(path[6:]))):
+            file = Path(unquote(path[6:]))
+            mime = mimetypes.guess_type(str(file))[0] or "application/octet-stream"
+            self._send(200, mime, file.read_bytes())
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def log_message(self, format, *args):  # noqa: A002
+        # Keep the terminal quiet; the preview reloads several times a second
+        pass
@@ -1,13 +1,54 @@
 """Module defining the Question class."""
 
-from dataclasses import dataclass
+import re
+import sys
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from pubquiz.paths import DirectoryCache
 
+input_regex = re.compile(r"\\input\{([^}]*)\}")
+
+# The fields whose values tend to be repeated across a question bank (the same credit, the same height, ...)
+interned_fields = {
+    "question_pic_height",
+    "question_pic_credit",
+    "answer_pic_height",
+    "answer_pic_credit",
+}
+
+_interned: Dict[Tuple[type, Any], Any] = {}
+
+
+def intern_value(value: Any) -> Any:
+    """Return a canonical copy of a string or number, so that equal values share a single object."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, (int, float)):
+        # Key on the type as well, as True == 1 == 1.0
+        return _interned.setdefault((type(value), value), value)
+    return value
+
+
+def _slotted(cls):
+    """Recreate a dataclass with ``__slots__``, so that its instances have no ``__dict__``.
+
+    This is what ``@dataclass(slots=True)`` does on Python 3.10 and later.
+    """
+    names = tuple(f.name for f in fields(cls))
+    dct = {k: v for k, v in cls.__dict__.items() if k not in names + ("__dict__", "__weakref__")}
+    dct["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, dct)
+
+
+@_slotted
 @dataclass
 class Question:
-    """Class representing a question in a pub quiz."""
+    """Class representing a question in a pub quiz.
+
+    Questions are slotted, as a whole archive of them may be loaded at once.
+    """
 
     question: Optional[str] = None
     answer: Optional[str] = None
@@ -19,34 +60,68 @@ class Question:
     answer_pic_height: float = 0.6
     answer_pic_credit: Optional[str] = None
     answer_slide: Optional[Path] = None
+    # Other answers that are also correct, for grading typed answers (see :mod:`pubquiz.grading`)
+    alternates: Optional[List[str]] = None
+
+    # A factory rather than a default, so that __init__ sets it (slots leave no class attribute to fall back on)
+    _resolved: bool = field(default_factory=bool, init=False, repr=False, compare=False)
+
+    def resolve_paths(self, directories: Optional[DirectoryCache] = None):
+        r"""Replace any text that is the name of an existing file with an ``\input`` of that file.
 
-    def __post_init__(self):
-        if self.question and Path(self.question).exists():
-            self.question = r"\input{" + self.question + "}"
-        if self.answer and Path(self.answer).exists():
-            self.answer = r"\input{" + self.answer + "}"
-        if self.question_slide and Path(self.question_slide).exists():
-            self.question_slide = r"\input{" + self.question_slide + "}"
-        if self.answer_slide and Path(self.answer_slide).exists():
-            self.answer_slide = r"\input{" + self.answer_slide + "}"
+        This is done lazily (at render time) rather than when the question is created, so that loading a quiz
+        does not touch the file system. Pass the same ``directories`` cache for all the questions of a quiz so
+        that each directory is only listed once.
+        """
+        if self._resolved:
+            return
+        directories = directories or DirectoryCache()
+        for attr in ["question", "answer", "question_slide", "answer_slide"]:
+            value = getattr(self, attr)
+            if value and isinstance(value, str) and directories.exists(value):
+                setattr(self, attr, r"\input{" + value + "}")
+        self._resolved = True
 
     def __repr__(self):
         return self.question + " (" + self.answer + ")"
 
     @classmethod
     def from_dict(cls, dct):
-        """Create a question object from a dictionary."""
-        return cls(**dct)
+        """Create a question object from a dictionary, sharing repeated values with other questions."""
+        return cls(**{k: intern_value(v) if k in interned_fields else v for k, v in dct.items()})
+
+    def referenced_files(self) -> List[Path]:
+        r"""List the files that this question refers to (pictures and ``\input`` files)."""
+        self.resolve_paths()
+        files = [Path(p) for p in (self.question_pic, self.answer_pic) if p]
+        for text in (self.question, self.answer, self.question_slide, self.answer_slide):
+            if isinstance(text, str):
+                files += [Path(f) for f in input_regex.findall(text)]
+        return files
+
+    @property
+    def has_custom_slides(self) -> bool:
+        """Whether the question or answer slide is provided by hand."""
+        return bool(self.question_slide or self.answer_slide)
+
+    def to_slide(self, index, with_answer=False, label=None):
+        r"""Generate the LaTeX code for a slide presenting this question.
+
+        :param index: the number of the question within its round
+        :param with_answer: if True, the answer is revealed on the second overlay of the slide
+        :param label: if given, the frame is labelled so that it can be shown again with ``\againframe``, and
+            only its first overlay (without the answer) is shown here
+        """
+        self.resolve_paths()
 
-    def to_slide(self, index, with_answer=False):
-        """Generate the LaTeX code for a slide presenting this question."""
         # Allow manual override of as_slide(), to allow for more complex slides to be generated by hand
         if self.question_slide and not with_answer:
             return "\n".join([r"\begin{frame}", self.question_slide, r"\end{frame}"])
         elif self.answer_slide and with_answer:
             return "\n".join([r"\begin{frame}", self.answer_slide, r"\end{frame}"])
 
-        lines = [r"\begin{frame}", r"\begin{center}", r"\Large", f"{index}. {self.question}"]
+        begin = r"\begin{frame}" if label is None else r"\begin{frame}<1>[label=" + label + "]"
+        lines = [begin, r"\begin{center}", r"\Large", f"{index}. {self.question}"]
         if self.question_pic:
             pic = r"\vspace{0.5em}"
             pic += (
@@ -1,28 +1,78 @@
 """Module containing the Quiz class."""
 
+import random
 import shutil
 from collections import UserList
 from pathlib import Path
-from typing import List, Optional
-
-from yaml import safe_load
+from typing import Iterator, List, Optional
 
 from pubquiz.latex_templates import path as latex_templates_path
+from pubquiz.loader import load_yaml
+from pubquiz.paths import DirectoryCache
 from pubquiz.round import Round
+from pubquiz.timings import stage, timed_iter
+
+templates = {
+    "sheets": ["sheets_header.tex"],
+    "slides": ["slides_header.tex", "slides_preamble.tex", "photo.png"],
+}
+
+template_messages = {
+    "sheets_header.tex": ". Please edit this file to suit your needs.",
+    "slides_header.tex": ". Please edit this file to suit your needs.",
+    "photo.png": " to use in the title slide. Please replace this file to suit your needs.",
+    "slides_preamble.tex": ". Please edit this file to suit your needs.",
+}
+
+
+def input_header(name: str) -> str:
+    """Generate the LaTeX code that loads a header, unless it was preloaded from a precompiled format.
+
+    See :func:`pubquiz.compile.precompile_header`.
+    """
+    return r"\ifdefined\pubquizheader\else\input{" + name + r"}\fi"
+
+
+def copy_template(name: str, directory: Optional[Path] = None):
+    """Copy the default version of a template into ``directory`` (by default the current one), unless it has one."""
+    directory = directory or Path(".")
+    if not (directory / name).exists():
+        shutil.copy(latex_templates_path / name, directory)
+        print(f"Generating a default {name} file{template_messages[name]}")
 
 
 class Quiz(UserList):
     """Class representing a pub quiz."""
 
     def __init__(
-        self, title, author: str, date: str = r"\today", rounds: Optional[List[Round]] = None
+        self,
+        title,
+        author: str,
+        date: str = r"\today",
+        rounds: Optional[List[Round]] = None,
+        overlays: bool = False,
+        variants: int = 1,
+        seed: Optional[int] = None,
     ):
-        """Initialize the quiz."""
+        """Initialize the quiz.
+
+        :param variants: the number of variants of the sheets, each with the questions of the randomized rounds in
+            a different order (see :meth:`variant`)
+        :param seed: the seed from which the order of the questions in every variant is derived
+        """
         rounds = rounds or []
         super().__init__(rounds)
         self.title = title
         self.author = author
         self.date = date
+        # Reveal the answers on the slides with overlays (see Round.iter_slides)
+        self.overlays = overlays
+        self.variants = variants
+        self.seed = seed
+        if seed is not None:
+            self.reseed(seed)
+        # The directory containing the headers and other templates
+        self.template_dir = Path(".")
 
     def __repr__(self) -> str:
         return f"Quiz(title={self.title}, rounds=[{', '.join([r.title for r in self])}])"
@@ -34,30 +84,109 @@ class Quiz(UserList):
         return cls(**dct, rounds=[Round.from_dict(r) for r in rounds])
 
     @classmethod
-    def from_yaml(cls, filename: Path):
-        """Create a quiz object from a yaml file."""
-        with open(filename, "r") as f:
-            dct = safe_load(f)
-        return cls.from_dict(dct)
+    def from_yaml(cls, filename: Path, use_cache: bool = True):
+        """Create a quiz object from a yaml file.
 
-    def to_sheets(self, with_answers=False) -> str:
+        :param filename: the yaml file
+        :param use_cache: if True, reuse the cached contents of the file if it has not changed since it was parsed
         """
-        Generate the latex code for the quiz sheets.
+        with stage("load yaml"):
+            return cls.from_dict(load_yaml(filename, use_cache=use_cache))
 
-        :param with_answers: if True, the answers to the questions will be included in the sheets.
-        :type with_answers: bool
+    def resolve_paths(self):
+        """Resolve the references to files in all the questions, listing each directory only once."""
+        directories = DirectoryCache()
+        with stage("resolve paths"):
+            for r in self:
+                r.resolve_paths(directories)
 
-        :returns: a list of strings containing the latex code for the quiz sheets
+    def referenced_files(self, output: str) -> List[Path]:
+        """List the files that the LaTeX code for a given output refers to.
+
+        :param output: the output in question (``"sheets"`` or ``"slides"``)
+
+        :returns: the header templates and all the files referred to by the rounds
         """
-        # Make sure we have sheets_header.tex in the current directory
-        if not Path("sheets_header.tex").exists():
-            shutil.copy(latex_templates_path / "sheets_header.tex", ".")
-            print(
-                "Generating a default sheets_header.tex file. Please edit this file to suit your needs."
-            )
+        self.resolve_paths()
+        files = [self.template_dir / t for t in templates[output]]
+        for r in self:
+            files += r.referenced_files()
+        return files
+
+    def reseed(self, seed: int):
+        """Set the seed, putting the questions of every randomized round in the order of the first variant."""
+        self.seed = seed
+        self.data = [r.shuffled(f"{seed}/0/{i}") for i, r in enumerate(self)]
+
+    def seed_variants(self) -> Optional[int]:
+        """Pick a seed for a quiz with several variants but no seed, so that the first variant matches the slides.
+
+        :returns: the seed that was picked, or None if the quiz did not need one
+        """
+        if self.variants <= 1 or self.seed is not None:
+            return None
+        self.reseed(random.SystemRandom().randrange(1 << 31))
+        return self.seed
+
+    def variant(self, index: int) -> "Quiz":
+        """Return a variant of this quiz, with the questions of the randomized rounds in a reproducible order.
 
+        Only the rounds that are solved in the teams' own time (on the sheets) are reordered. The other rounds are
+        read out from the slides, so they stay in the order of the slides in every variant. The order depends only
+        on :attr:`seed`, ``index`` and the position of the round, so the same variant can be printed again later
+        (e.g. to mark the sheets of the team that got it).
+
+        :param index: the index of the variant (the first variant is 0)
+        """
+        quiz = Quiz(
+            self.title,
+            self.author,
+            date=self.date,
+            rounds=[
+                r.shuffled(f"{self.seed}/{index}/{i}") if r.solve_in_own_time else r
+                for i, r in enumerate(self)
+            ],
+            overlays=self.overlays,
+        )
+        quiz.seed = self.seed
+        quiz.template_dir = self.template_dir
+        return quiz
+
+    def _variant_label(self, index: int) -> List[str]:
+        """Generate the LaTeX code that labels the pages of a variant (A, B, ..., Z, AA, AB, ...)."""
+        if self.variants <= 1:
+            return []
+        label = ""
+        index += 1
+        while index:
+            index, rest = divmod(index - 1, 26)
+            label = chr(ord("A") + rest) + label
+        return [r"\lhead{\Large Variant " + label + "}"]
+
+    def copy_templates(self, output: str):
+        """Copy the default versions of the templates of an output into the template directory, unless it has them.
+
+        :param output: the output in question (``"sheets"`` or ``"slides"``)
+        """
+        with stage("copy templates"):
+            for name in templates[output]:
+                copy_template(name, self.template_dir)
+
+    def _sheets_header(self, with_answers=False) -> List[str]:
+        """Generate the LaTeX code that starts the sheets document."""
+        # Make sure we have sheets_header.tex in the template directory
+        self.copy_templates("sheets")
+
+        lines = [input_header("sheets_header")]
+        if not with_answers:
+            lines += [r"\rhead{\huge \fbox{\parbox{3.5cm}{Score}}}"]
+        lines += [r"\begin{document}"]
+        return lines
+
+    def _sheets_titlepage(self) -> List[str]:
+        """Generate the LaTeX code for the title page of the sheets, with its table of scores."""
         # N.B. will not do picture and puzzle rounds, these must be contained in pictures.tex and puzzles.tex
-        titlepage = (
+        return (
             [
                 r"\centering",
                 r"\Huge",
@@ -85,59 +214,125 @@ class Quiz(UserList):
             ]
         )
 
+    def iter_sheets(self, with_answers=False) -> Iterator[str]:
+        """
+        Generate the latex code for the quiz sheets, one line at a time.
+
+        :param with_answers: if True, the answers to the questions will be included in the sheets.
+        :type with_answers: bool
+
+        :returns: an iterator over the lines of latex code for the quiz sheets
+        """
+        self.resolve_paths()
+
         # Header
-        lines = [r"\input{sheets_header}"]
-        if not with_answers:
-            lines += [r"\rhead{\huge \fbox{\parbox{3.5cm}{Score}}}"]
-        lines += [r"\begin{document}"]
+        yield from self._sheets_header(with_answers)
 
-        if not with_answers:
-            lines += titlepage
+        # All the variants go into the same document, so that the header is only loaded once
+        for v in range(self.variants):
+            quiz = self.variant(v) if self.variants > 1 else self
+            if v > 0:
+                yield from [r"\newpage", r"\setcounter{page}{1}"]
+            yield from self._variant_label(v)
 
-        # Standard rounds
-        for i, r in enumerate(self):
-            lines += r.to_sheets(with_answers=with_answers, index=i + 1)
+            if not with_answers:
+                yield from quiz._sheets_titlepage()
+
+            # Standard rounds
+            for i, r in enumerate(quiz):
+                yield from timed_iter(
+                    f"render sheets: round {i + 1}",
+                    r.iter_sheets(with_answers=with_answers, index=i + 1),
+                )
 
         # Footer
-        lines += [r"\end{document}"]
+        yield r"\end{document}"
 
-        return "\n".join(lines)
+    def to_sheets(self, with_answers=False) -> str:
+        """
+        Generate the latex code for the quiz sheets.
 
-    def to_slides(self) -> str:
-        """Generate the latex code for the quiz slides."""
+        :param with_answers: if True, the answers to the questions will be included in the sheets.
+        :type with_answers: bool
+
+        :returns: a string containing the latex code for the quiz sheets
+        """
+        return "\n".join(self.iter_sheets(with_answers=with_answers))
+
+    def to_sheets_parts(self, with_answers=False) -> List[str]:
+        """
+        Generate the latex code for the quiz sheets, split into standalone documents that can be compiled separately.
+
+        :param with_answers: if True, the answers to the questions will be included in the sheets.
+        :type with_answers: bool
+
+        :returns: a list of LaTeX documents: one for the title page (if there is one) followed by one per round,
+            for every variant
+        """
+        self.resolve_paths()
+        header = self._sheets_header(with_answers)
+        footer = [r"\end{document}"]
+
+        parts = []
+        for v in range(self.variants):
+            quiz = self.variant(v) if self.variants > 1 else self
+            label = self._variant_label(v)
+            if not with_answers:
+                parts.append(header + label + quiz._sheets_titlepage() + footer)
+            for i, r in enumerate(quiz):
+                rendered = r.to_sheets(with_answers=with_answers, index=i + 1)
+                parts.append(header + label + rendered + footer)
+
+        return ["\n".join(lines) for lines in parts]
+
+    def _slides_header(self) -> List[str]:
+        """Generate the LaTeX code that starts the slides document."""
         # Ensure we have the header and preamble
-        if not Path("slides_header.tex").exists():
-            shutil.copy(latex_templates_path / "slides_header.tex", ".")
-            print(
-                "Generating a default slides_header.tex file. Please edit this file to suit your needs."
-            )
-        if not Path("photo.png").exists():
-            shutil.copy(latex_templates_path / "photo.png", ".")
-            print(
-                "Generating a default photo.png file to use in the title slide. Please replace this file to "
-                "suit your needs."
-            )
-        if not Path("slides_preamble.tex").exists():
-            shutil.copy(latex_templates_path / "slides_preamble.tex", ".")
-            print(
-                "Generating a default slides_preamble.tex file. Please edit this file to suit your needs."
-            )
+        self.copy_templates("slides")
 
-        # Header
         lines = [
-            r"\input{slides_header}",
+            input_header("slides_header"),
             r"\title{" + self.title + "}",
             r"\author{" + self.author + "}",
         ]
         date = self.date or r"\today"
         lines += [r"\date{" + date + "}"]
-        lines += [r"\begin{document}", r"\frame{\titlepage}", r"\include{slides_preamble}"]
+        lines += [r"\begin{document}"]
+        return lines
+
+    def iter_slides(self) -> Iterator[str]:
+        """Generate the latex code for the quiz slides, one chunk at a time."""
+        self.resolve_paths()
+
+        # Header
+        yield from self._slides_header()
+        yield from [r"\frame{\titlepage}", r"\include{slides_preamble}"]
 
         # Loop over rounds and generate slides
         for i, r in enumerate(self):
-            lines += r.to_slides(index=i + 1)
+            yield from timed_iter(
+                f"render slides: round {i + 1}", r.iter_slides(index=i + 1, overlays=self.overlays)
+            )
 
         # Footer
-        lines += [r"\end{document}"]
+        yield r"\end{document}"
+
+    def to_slides(self) -> str:
+        """Generate the latex code for the quiz slides."""
+        return "\n".join(self.iter_slides())
+
+    def to_slides_parts(self) -> List[str]:
+        """
+        Generate the latex code for the quiz slides, split into standalone documents that can be compiled separately.
+
+        :returns: a list of LaTeX documents: one for the title slide and preamble followed by one per round
+        """
+        self.resolve_paths()
+        header = self._slides_header()
+        footer = [r"\end{document}"]
+
+        parts = [header + [r"\frame{\titlepage}", r"\include{slides_preamble}"] + footer]
+        for i, r in enumerate(self):
+            parts.append(header + r.to_slides(index=i + 1, overlays=self.overlays) + footer)
 
-        return "\n".join(lines)
+        return ["\n".join(lines) for lines in parts]
@@ -1,10 +1,11 @@
 """Module for the Round class."""
 
+import random
 from collections import UserList
 from pathlib import Path
-from random import shuffle
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Union
 
+from pubquiz.paths import DirectoryCache
 from pubquiz.question import Question
 from pubquiz.slides import header_slide
 
@@ -20,17 +21,59 @@ class Round(UserList):
         solve_in_own_time: bool = False,
         randomize: bool = False,
         sheets: Optional[Path] = None,
+        seed: Optional[Union[int, str]] = None,
     ):
-        """Initialize the round."""
+        """Initialize the round.
+
+        :param randomize: if True, shuffle the questions
+        :param seed: the seed for shuffling the questions (by default, they are shuffled differently every time)
+        """
         questions = questions or []
         if randomize:
-            shuffle(questions)
+            # Keep the original order, so that the round can be reshuffled reproducibly (see shuffled())
+            self._unshuffled = list(questions)
+            random.Random(seed).shuffle(questions)
         super().__init__(questions)
         self.title = title
         self.description = description
         self.solve_in_own_time = solve_in_own_time
         self.randomize = randomize
         self.sheets = sheets
+        self.seed = seed
+
+    def shuffled(self, seed: Union[int, str]) -> "Round":
+        """Return a copy of this round with the questions shuffled by ``seed`` (if the round is randomized).
+
+        The same seed always gives the same order, whatever order the questions of this round are in.
+        """
+        if not self.randomize:
+            return self
+        return type(self)(
+            self.title,
+            description=self.description,
+            questions=list(self._unshuffled),
+            solve_in_own_time=self.solve_in_own_time,
+            randomize=True,
+            sheets=self.sheets,
+            seed=seed,
+        )
+
+    def map_questions(self, function: Callable[[Question], Question]) -> "Round":
+        """Return a copy of this round with every question replaced by ``function(question)``, in the same order."""
+        questions: Dict[int, Question] = {id(q): function(q) for q in self}
+        copy = type(self)(
+            self.title,
+            description=self.description,
+            questions=[questions[id(q)] for q in self],
+            solve_in_own_time=self.solve_in_own_time,
+            sheets=self.sheets,
+            seed=self.seed,
+        )
+        if self.randomize:
+            # Set after creating the copy, so that its questions are not shuffled again
+            copy.randomize = True
+            copy._unshuffled = [questions[id(q)] for q in self._unshuffled]
+        return copy
 
     def __repr__(self):
         return f"Round(title={self.title})"
@@ -41,75 +84,129 @@ class Round(UserList):
         questions = dct.pop("questions", [])
         return cls(**dct, questions=[Question.from_dict(q) for q in questions])
 
-    def _sheets_content(self, with_answers: bool = True) -> List[str]:
+    def resolve_paths(self, directories: Optional[DirectoryCache] = None):
+        """Resolve the references to files in all the questions of this round (see :meth:`Question.resolve_paths`)."""
+        directories = directories or DirectoryCache()
+        for q in self:
+            q.resolve_paths(directories)
+
+    def referenced_files(self) -> List[Path]:
+        """List the files that this round refers to."""
+        self.resolve_paths()
+        files = [Path(self.sheets)] if self.sheets else []
+        for q in self:
+            files += q.referenced_files()
+        return files
+
+    def _iter_sheets_content(self, with_answers: bool = True) -> Iterator[str]:
         """Generate the LaTeX code for the body of the sheet for this round, either with or without the answers."""
         if self.sheets:
-            return [r"\input{" + str(self.sheets) + "}"]
+            yield r"\input{" + str(self.sheets) + "}"
+            return
+
+        self.resolve_paths()
 
-        lines = []
         if with_answers:
-            lines += [r"\large", r"\begin{enumerate}"]
-            lines += [r"\item " + str(q) for q in self]
-            lines += [r"\end{enumerate}", r"\LARGE"]
+            yield from [r"\large", r"\begin{enumerate}"]
+            yield from (r"\item " + str(q) for q in self)
+            yield from [r"\end{enumerate}", r"\LARGE"]
         else:
             if self.solve_in_own_time:
-                lines += [r"\large"]
+                yield r"\large"
             else:
-                lines += [r"\Huge"]
-            lines += [r"\begin{enumerate}"]
+                yield r"\Huge"
+            yield r"\begin{enumerate}"
             if self.solve_in_own_time:
                 # Show the questions
-                lines += [rf"\item {q.question}" for q in self]
+                yield from (rf"\item {q.question}" for q in self)
             else:
-                lines += [r"\item" for _ in self]
-            lines += [r"\end{enumerate}", ""]
-        return lines
+                yield from (r"\item" for _ in self)
+            yield from [r"\end{enumerate}", ""]
 
-    def to_sheets(self, with_answers=True, index=1) -> List[str]:
-        """Generate the LaTeX code for the quiz sheets."""
+    def iter_sheets(self, with_answers=True, index=1) -> Iterator[str]:
+        """Generate the LaTeX code for the quiz sheets, one line at a time."""
         header = self.title if ":" in self.title else f"Round {index}: {self.title}"
-        lines = [r"\newpage", r"\begin{center}", r"\Huge", header, r"\end{center}"]
+        yield from [r"\newpage", r"\begin{center}", r"\Huge", header, r"\end{center}"]
 
-        lines += [r"\large"]
+        yield r"\large"
 
         if len(self.description) > 0:
-            lines += [self.description, ""]
+            yield from [self.description, ""]
+
+        yield from self._iter_sheets_content(with_answers=with_answers)
 
-        lines += self._sheets_content(with_answers=with_answers)
-        return lines
+    def to_sheets(self, with_answers=True, index=1) -> List[str]:
+        """Generate the LaTeX code for the quiz sheets."""
+        return list(self.iter_sheets(with_answers=with_answers, index=index))
 
-    def _slides_content(self, with_answers: bool = True) -> List[str]:
+    def _iter_slides_content(self, with_answers: bool = True) -> Iterator[str]:
         """Generate the LaTeX code for the slides, either with or without the answers."""
-        lines = []
+        self.resolve_paths()
         for iq, q in enumerate(self):
-            lines.append(q.to_slide(index=iq + 1, with_answer=with_answers))
-        return lines
+            yield q.to_slide(index=iq + 1, with_answer=with_answers)
 
-    def to_slides(self, index=1) -> List[str]:
-        """Generate the LaTeX code for the slides.
+    def _iter_overlay_slides(self, index: int, answers: bool) -> Iterator[str]:
+        r"""Generate the LaTeX code for the slides in overlay mode.
+
+        Each question is written once, as a labelled frame that shows only the question. The answers section
+        then jumps back to that frame with ``\againframe`` to reveal the answer. Questions with hand-written
+        slides fall back to separate frames.
+        """
+        self.resolve_paths()
+        for iq, q in enumerate(self):
+            label = f"pubquiz-r{index}q{iq + 1}"
+            if q.has_custom_slides:
+                yield q.to_slide(index=iq + 1, with_answer=answers)
+            elif answers:
+                yield r"\againframe<1->{" + label + "}"
+            else:
+                yield q.to_slide(index=iq + 1, with_answer=True, label=label)
+
+    def iter_slides(self, index=1, overlays=False) -> Iterator[str]:
+        """Generate the LaTeX code for the slides, one chunk at a time.
 
         Includes headers and (possibly) first all the questions without and then with the answers
 
         :param index: the index of the round
         :type index: int
+        :param overlays: if True, write the frame of every question once and reveal its answer by showing that
+            frame again, rather than writing each question twice (pdflatex still typesets it twice)
+        :type overlays: bool
 
-        :returns: a list containing the lines of latex code for the slides
+        :returns: an iterator over the chunks of latex code for the slides
         """
         # Round header
         if ":" not in self.title:
             heading = f"Round {index}: {self.title}"
         else:
             heading = self.title
-        lines = header_slide(heading)
-
-        if not self.solve_in_own_time:
+        yield from header_slide(heading)
+
+        if self.solve_in_own_time:
+            # Only the questions with answers
+            yield from self._iter_slides_content(with_answers=True)
+        elif overlays:
+            yield from self._iter_overlay_slides(index, answers=False)
+            yield from header_slide("Answers")
+            yield from self._iter_overlay_slides(index, answers=True)
+        else:
             # Questions without answers
-            lines += self._slides_content(with_answers=False)
+            yield from self._iter_slides_content(with_answers=False)
 
             # Answer header
-            lines += header_slide("Answers")
+            yield from header_slide("Answers")
 
-        # Questions with answers
-        lines += self._slides_content(with_answers=True)
+            # Questions with answers
+            yield from self._iter_slides_content(with_answers=True)
 
-        return lines
+    def to_slides(self, index=1, overlays=False) -> List[str]:
+        """Generate the LaTeX code for the slides.
+
+        :param index: the index of the round
+        :type index: int
+        :param overlays: if True, reveal the answers with overlays (see :meth:`iter_slides`)
+        :type overlays: bool
+
+        :returns: a list containing the lines of latex code for the slides
+        """
+        return list(self.iter_slides(index=index, overlays=overlays))
@@ -0,0 +1,377 @@
+"""Module for keeping the scores of a quiz night, with a live leaderboard for the projector.
+
+Run with ``pubquiz scoreboard QUIZ.yaml`` (see ``pubquiz scoreboard --help``). Markers enter scores on
+``/mark`` (from any number of phones or laptops at once), and ``/`` shows the leaderboard, which is pushed to
+the browser with server-sent events whenever a score changes.
+
+The server runs on :mod:`asyncio`, so that hundreds of markers and screens are served from a single thread.
+Totals are kept up to date incrementally, and the leaderboard is serialized once per change however many
+screens show it; a screen that falls behind skips straight to the latest leaderboard.
+"""
+
+import asyncio
+import html
+import json
+import math
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pubquiz.preview import latex_to_html
+
+PathLike = Union[str, Path]
+
+# The largest request body that is accepted, in bytes
+max_body = 1 << 20
+
+# How often an idle event stream is kept alive, in seconds
+keepalive_interval = 15.0
+
+
+def parse_score(score: Any) -> Optional[float]:
+    """Check a submitted score, which is a number or ``None`` (no score)."""
+    if score is None:
+        return None
+    if isinstance(score, bool):
+        raise ValueError(f"Invalid score {score!r}")
+    try:
+        value = float(score)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid score {score!r}") from None
+    if not math.isfinite(value):
+        raise ValueError(f"Invalid score {score!r}")
+    return value
+
+
+class Scoreboard:
+    """Class for keeping the scores of every team in every round, and their totals."""
+
+    def __init__(self, rounds: Iterable[str], teams: Iterable[str] = ()):
+        """Initialize the scoreboard.
+
+        :param rounds: the titles of the rounds
+        :param teams: the teams to show before they have any score (other teams are added on their first score)
+        """
+        self.rounds = list(rounds)
+        self.scores: Dict[str, List[Optional[float]]] = {}
+        self.totals: Dict[str, float] = {}
+        # Incremented on every change, so that clients can tell whether they are up to date
+        self.version = 0
+        for team in teams:
+            self.add_team(team)
+
+    def add_team(self, team: str):
+        """Add a team without any scores (if it is not on the scoreboard yet)."""
+        team = str(team).strip()
+        if not team:
+            raise ValueError("The name of a team cannot be empty")
+        if team not in self.scores:
+            self.scores[team] = [None] * len(self.rounds)
+            self.totals[team] = 0.0
+            self.version += 1
+
+    def round_index(self, key: Union[int, str]) -> int:
+        """Find a round by its number (starting at 1) or its title."""
+        if isinstance(key, str) and key in self.rounds:
+            return self.rounds.index(key)
+        try:
+            index = int(key) - 1
+        except (TypeError, ValueError):
+            raise ValueError(f"There is no round {key!r}") from None
+        if not 0 <= index < len(self.rounds):
+            raise ValueError(f"There is no round {key!r}")
+        return index
+
+    def submit(self, team: str, round_key: Union[int, str], score: Optional[float]) -> float:
+        """Set (or with ``None``, clear) the score of a team in a round.
+
+        :returns: the new total of the team
+        """
+        index = self.round_index(round_key)
+        score = parse_score(score)
+        self.add_team(team)
+        team = str(team).strip()
+        scores = self.scores[team]
+        self.totals[team] += (score or 0.0) - (scores[index] or 0.0)
+        scores[index] = score
+        self.version += 1
+        return self.totals[team]
+
+    def changed_since(self, version: Optional[int]) -> bool:
+        """Whether the scoreboard has changed since it was at ``version``."""
+        return version != self.version
+
+    def leaderboard(self) -> List[Dict[str, Any]]:
+        """List the teams from the highest total to the lowest; teams with the same total share their rank."""
+        ordered = sorted(self.totals.items(), key=lambda item: (-item[1], item[0].lower()))
+        leaderboard: List[Dict[str, Any]] = []
+        for position, (team, total) in enumerate(ordered):
+            if position and total == leaderboard[-1]["total"]:
+                rank = leaderboard[-1]["rank"]
+            else:
+                rank = position + 1
+            leaderboard.append(
+                {"rank": rank, "team": team, "total": total, "scores": self.scores[team]}
+            )
+        return leaderboard
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Represent the scoreboard as a dictionary (which is what the clients receive)."""
+        return {
+            "version": self.version,
+            "rounds": [latex_to_html(r) for r in self.rounds],
+            "teams": self.leaderboard(),
+        }
+
+
+_page = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{page_title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2vh 2vw; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ padding: 0.2em 0.5em; text-align: right; border-bottom: 1px solid #ccc; }}
+th.team, td.team {{ text-align: left; }}
+td.total {{ font-weight: bold; }}
+form {{ display: flex; flex-wrap: wrap; gap: 0.5em; margin-bottom: 1em; font-size: 1.2em; }}
+input, select, button {{ font-size: 1em; }}
+#status {{ margin-bottom: 1em; }}
+</style></head><body>
+<h1>{title}</h1>
+{body}
+<table><thead></thead><tbody></tbody></table>
+<script>
+function text(value) {{ return value === null ? "" : String(value); }}
+function render(board) {{
+    const head = document.querySelector("thead"), body = document.querySelector("tbody");
+    head.innerHTML = "<tr><th>#</th><th class='team'>Team</th>"
+        + board.rounds.map((r) => "<th>" + r + "</th>").join("") + "<th>Total</th></tr>";
+    const rows = board.teams.map((t) => {{
+        const row = document.createElement("tr");
+        [t.rank, t.team].concat(t.scores, [t.total]).forEach((value, k) => {{
+            const cell = document.createElement("td");
+            cell.textContent = text(value);
+            if (k === 1) cell.className = "team";
+            if (k === t.scores.length + 2) cell.className = "total";
+            row.appendChild(cell);
+        }});
+        return row;
+    }});
+    body.replaceChildren(...rows);
+    if (window.update) window.update(board);
+}}
+new EventSource("/events").onmessage = (e) => render(JSON.parse(e.data));
+{script}
+</script>
+</body></html>
+"""
+
+_marker_form = """<form>
+<input name="team" placeholder="Team" list="teams" required autocomplete="off"><datalist id="teams"></datalist>
+<select name="round"></select>
+<input name="score" type="number" step="any" placeholder="Score">
+<button>Submit</button>
+</form>
+<div id="status"></div>
+"""
+
+_marker_script = """
+window.update = (board) => {
+    const select = document.querySelector("select");
+    if (!select.options.length) {
+        board.rounds.forEach((r, k) => { select.add(new Option("", k + 1)); select.options[k].innerHTML = r; });
+    }
+    document.querySelector("datalist").replaceChildren(...board.teams.map((t) => new Option(t.team)));
+};
+document.querySelector("form").onsubmit = async (e) => {
+    e.preventDefault();
+    const form = e.target, status = document.querySelector("#status");
+    const score = form.score.value === "" ? null : Number(form.score.value);
+    const response = await fetch("/scores", {method: "POST", headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({team: form.team.value, round: Number(form.round.value), score: score})});
+    const result = await response.json();
+    status.textContent = response.ok ? form.team.value + ": " + result.totals[form.team.value.trim()]
+        + " in total" : result.error;
+    if (response.ok) { form.team.value = ""; form.score.value = ""; form.team.focus(); }
+};
+"""
+
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}
+
+
+class ScoreboardServer:
+    """Class for serving a scoreboard over HTTP, on an :mod:`asyncio` event loop.
+
+    The routes are:
+
+    - ``GET /``: the leaderboard, for the projector
+    - ``GET /mark``: the leaderboard with a form for entering scores
+    - ``GET /scores``: the scoreboard as JSON (see :meth:`Scoreboard.to_dict`)
+    - ``POST /scores``: submit one score or a list of them, as JSON objects with a ``team``, a ``round`` (its
+      number or title) and a ``score`` (``null`` to clear it)
+    - ``GET /events``: a stream of server-sent events with the scoreboard, sent whenever it changes
+    """
+
+    def __init__(
+        self, scoreboard: Scoreboard, title: str = "Scoreboard", log_file: Optional[PathLike] = None
+    ):
+        """Initialize the server.
+
+        :param scoreboard: the scoreboard
+        :param title: the title of the pages
+        :param log_file: a file to which every submitted score is appended (as a JSON line); scores that were
+            logged earlier are replayed first, so that a restarted server picks up where it left off
+        """
+        self.scoreboard = scoreboard
+        self.title = title
+        self.log_file = Path(log_file) if log_file else None
+        self._snapshot: Tuple[int, bytes] = (-1, b"")
+        self._changed: Optional[asyncio.Condition] = None
+        if self.log_file and self.log_file.exists():
+            with open(self.log_file) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        scoreboard.submit(entry["team"], entry["round"], entry["score"])
+
+    def snapshot(self) -> bytes:
+        """Serialize the scoreboard, once per version."""
+        if self._snapshot[0] != self.scoreboard.version:
+            data = json.dumps(self.scoreboard.to_dict()).encode()
+            self._snapshot = (self.scoreboard.version, data)
+        return self._snapshot[1]
+
+    def page(self, marker: bool) -> bytes:
+        """Generate the leaderboard page, with or without the form for entering scores."""
+        title = latex_to_html(self.title)
+        body, script = (_marker_form, _marker_script) if marker else ("", "")
+        return _page.format(
+            page_title=html.escape(self.title), title=title, body=body, script=script
+        ).encode()
+
+    async def submit(self, body: bytes) -> Dict[str, Any]:
+        """Submit the scores in the body of a request, and notify the event streams."""
+        entries = json.loads(body)
+        if isinstance(entries, dict):
+            entries = [entries]
+        if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+            raise ValueError("Expected a score or a list of scores")
+
+        # Check every entry before changing anything, so that a bad request leaves the scoreboard as it was
+        for entry in entries:
+            missing = {"team", "round", "score"} - set(entry)
+            if missing:
+                raise ValueError(f"A score is missing its {', '.join(sorted(missing))}")
+            self.scoreboard.round_index(entry["round"])
+            parse_score(entry["score"])
+            if not str(entry["team"]).strip():
+                raise ValueError("The name of a team cannot be empty")
+
+        totals = {}
+        for entry in entries:
+            team = str(entry["team"]).strip()
+            totals[team] = self.scoreboard.submit(team, entry["round"], entry["score"])
+        if self.log_file:
+            with open(self.log_file, "a") as f:
+                f.writelines(
+                    json.dumps({k: e[k] for k in ("team", "round", "score")}) + "\n"
+                    for e in entries
+                )
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+        return {"version": self.scoreboard.version, "totals": totals}
+
+    async def _events(self, writer: asyncio.StreamWriter):
+        """Stream the scoreboard to a client whenever it changes."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-store\r\n\r\n"
+        )
+        assert self._changed is not None
+        version = None
+        while True:
+            if version == self.scoreboard.version:
+                try:
+                    async with self._changed:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(partial(self.scoreboard.changed_since, version)),
+                            keepalive_interval,
+                        )
+                except asyncio.TimeoutError:
+                    # Also notices clients that have gone away
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+                    continue
+            version = self.scoreboard.version
+            writer.write(b"data: " + self.snapshot() + b"\n\n")
+            await writer.drain()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Handle any request but the event stream, returning its status, content type and body."""
+        if method == "GET" and path in ("/", "/mark"):
+            return 200, "text/html; charset=utf-8", self.page(marker=path == "/mark")
+        if path == "/scores" and method == "GET":
+            return 200, "application/json", self.snapshot()
+        if path == "/scores" and method == "POST":
+            try:
+                result = await self.submit(body)
+            except (ValueError, TypeError) as e:
+                return 400, "application/json", json.dumps({"error": str(e)}).encode()
+            return 200, "application/json", json.dumps(result).encode()
+        return 404, "text/plain", b"Not found"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle a connection (one request per connection)."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            path = target.split("?", 1)[0]
+
+            length = int(headers.get("content-length", 0))
+            if length > max_body:
+                status, content_type, body = 413, "text/plain", b"Request too large"
+            elif method == "GET" and path == "/events":
+                try:
+                    await self._events(writer)
+                except asyncio.CancelledError:
+                    # The server is shutting down; event streams never end by themselves
+                    pass
+                return
+            else:
+                status, content_type, body = await self._route(
+                    method, path, await reader.readexactly(length)
+                )
+
+            writer.write(
+                f"HTTP/1.1 {status} {_reasons[status]}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # A malformed request, or a client that went away
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Start serving on the running event loop (use port 0 to pick any free port)."""
+        self._changed = asyncio.Condition()
+        return await asyncio.start_server(self.handle, host, port)
+
+    def run(self, host: str = "127.0.0.1", port: int = 8080):
+        """Serve until interrupted."""
+
+        async def serve():
+            server = await self.start(host, port)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
@@ -0,0 +1,361 @@
+r"""Module for a local build service, so that quizzes can be built from a web form instead of the command line.
+
+Run with ``pubquiz serve`` (see ``pubquiz serve --help``). Quizzes are submitted as yaml (or JSON) to
+``POST /builds``, queued, and built by a pool of worker processes that keep pubquiz imported between builds.
+Identical submissions that are queued or running at the same time share a single build. For example:
+
+.. code-block:: shell
+
+    curl --data-binary @quiz.yaml 'http://127.0.0.1:8090/builds?output=slides&wait=60'
+    curl -o slides.pdf http://127.0.0.1:8090/builds/<id>/slides.pdf
+
+Files referred to by the quizzes (pictures, ``\input`` files, customised templates) are looked up in the
+directory the service was started from.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from pubquiz.build import build_isolated, valid_outputs
+from pubquiz.loader import parse_yaml
+from pubquiz.quiz import Quiz
+
+PathLike = Union[str, Path]
+
+# The largest quiz that is accepted, in bytes
+max_body = 10 << 20
+# The longest a request may wait for its build, in seconds
+max_wait = 600
+
+
+def _ready() -> bool:
+    """Do nothing; submitted once per worker so that the pool starts all its processes up front."""
+    return True
+
+
+def _run_job(
+    dct: Dict[str, Any],
+    outputs: List[str],
+    root: str,
+    build_dir: str,
+    name: str,
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Build a quiz in a worker process (see :meth:`BuildService.submit`).
+
+    :returns: for every output, whether it was built and the log to read if it was not; or the error that
+        stopped the build
+    """
+    try:
+        # The files referred to by the quiz are relative to the directory the service was started from
+        os.chdir(root)
+        quiz = Quiz.from_dict(dct)
+        results = build_isolated(quiz, outputs, Path(build_dir), name, jobs=1, **options)
+    except Exception as e:  # noqa: B902
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "outputs": {
+            o: {"ok": r is None or r.ok, "log": None if r is None or r.ok else str(r.log)}
+            for o, r in results.items()
+        }
+    }
+
+
+@dataclass
+class Job:
+    """Class representing a build submitted to the service."""
+
+    id: str
+    key: str
+    outputs: List[str]
+    # What the worker reported, only set once the job is no longer in flight (see BuildService._finished)
+    future: "Future[Dict[str, Any]]"
+    # The build in the worker pool
+    work: "Future[Dict[str, Any]]"
+
+    @property
+    def status(self) -> str:
+        """Whether the job is ``"queued"``, ``"running"``, ``"done"`` or ``"failed"``."""
+        if not self.future.done():
+            return "running" if self.work.running() else "queued"
+        result = self.result()
+        ok = "error" not in result and all(o["ok"] for o in result["outputs"].values())
+        return "done" if ok else "failed"
+
+    def result(self) -> Dict[str, Any]:
+        """Return what the worker reported (only once the job is finished)."""
+        if self.future.cancelled():
+            return {"error": "The build was cancelled"}
+        if self.future.exception() is not None:
+            # E.g. a worker process that crashed
+            return {"error": f"{type(self.future.exception()).__name__}: {self.future.exception()}"}
+        return self.future.result()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Represent the job as a dictionary, with the URLs of its pdfs and logs once it is finished."""
+        dct: Dict[str, Any] = {"id": self.id, "status": self.status}
+        if self.future.done():
+            result = self.result()
+            if "error" in result:
+                dct["error"] = result["error"]
+            else:
+                dct["outputs"] = {
+                    o: {
+                        "ok": r["ok"],
+                        "pdf": f"/builds/{self.id}/{o}.pdf" if r["ok"] else None,
+                        "log": f"/builds/{self.id}/{o}.log" if r["log"] else None,
+                    }
+                    for o, r in result["outputs"].items()
+                }
+        return dct
+
+
+class BuildService:
+    """Class for queueing builds and running them in a pool of worker processes."""
+
+    def __init__(
+        self,
+        root: PathLike,
+        work_dir: PathLike,
+        workers: int = 0,
+        max_queued: int = 100,
+        keep: int = 100,
+        **options,
+    ):
+        """Initialize the service and start its workers.
+
+        :param root: the directory in which to look up the files the quizzes refer to
+        :param work_dir: the directory in which to build the quizzes
+        :param workers: the number of quizzes to build in parallel (0 means one per CPU core)
+        :param max_queued: the number of jobs that may be queued or running at once; more are turned away
+        :param keep: the number of finished jobs whose pdfs are kept
+        :param options: the options for building every quiz (see :func:`pubquiz.build.build`)
+        """
+        self.root = Path(root).resolve()
+        self.work_dir = Path(work_dir).resolve()
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.max_queued = max_queued
+        self.keep = keep
+        self.options = options
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+        workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        # Start every worker now, rather than when the first volunteers hit "build". Running _ready imports this
+        # module, and with it the rest of pubquiz, so the workers are also warm before the first build.
+        for f in [self._executor.submit(_ready) for _ in range(workers)]:
+            f.result()
+
+    @staticmethod
+    def job_key(dct: Dict[str, Any], outputs: List[str]) -> str:
+        """Identify a build by the contents of the quiz and the outputs, so that duplicates can be detected."""
+        data = json.dumps({"quiz": dct, "outputs": sorted(outputs)}, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def submit(self, dct: Dict[str, Any], outputs: List[str]) -> Tuple[Job, bool]:
+        """Queue a build, unless an identical one is already queued or running.
+
+        :param dct: the contents of the quiz yaml file
+        :param outputs: the outputs to build (``"sheets"`` and/or ``"slides"``)
+
+        :returns: the job, and whether it was already queued or running
+        :raises RuntimeError: if too many jobs are queued already
+        """
+        key = self.job_key(dct, outputs)
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key], True
+            if len(self._in_flight) >= self.max_queued:
+                raise RuntimeError("Too many builds are queued; try again later")
+
+            job_id = uuid.uuid4().hex[:16]
+            work = self._executor.submit(
+                _run_job, dct, outputs, str(self.root), str(self.work_dir), job_id, self.options
+            )
+            job = Job(job_id, key, list(outputs), Future(), work)
+            self._jobs[job_id] = job
+            self._in_flight[key] = job
+            self._evict()
+        work.add_done_callback(lambda _: self._finished(job))
+        return job, False
+
+    def _finished(self, job: Job):
+        with self._lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+        # Only now wake up whoever waits for the job, so that they never find it still in flight
+        if job.work.cancelled():
+            job.future.cancel()
+        elif job.work.exception() is not None:
+            job.future.set_exception(job.work.exception())
+        else:
+            job.future.set_result(job.work.result())
+
+    def _evict(self):
+        """Forget the oldest finished jobs beyond the ones to keep, deleting their files."""
+        finished = [j for j in self._jobs.values() if j.future.done()]
+        for job in finished[: max(0, len(finished) - self.keep)]:
+            del self._jobs[job.id]
+            shutil.rmtree(self.work_dir / job.id, ignore_errors=True)
+            # The scratch directory of a failed build is kept for its logs (see build_isolated)
+            for scratch in (self.work_dir / ".scratch").glob(f"{job.id}-*"):
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Find a job by its id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def file(self, job: Job, output: str, kind: str) -> Optional[Path]:
+        """Find the pdf or the log (``kind``) of an output of a finished job, if there is one."""
+        if not job.future.done() or output not in job.outputs:
+            return None
+        result = job.result().get("outputs", {}).get(output)
+        if result is None:
+            return None
+        if kind == "pdf":
+            path = self.work_dir / job.id / f"{output}.pdf"
+        elif result["log"]:
+            path = Path(result["log"])
+        else:
+            return None
+        return path if path.exists() else None
+
+    def shutdown(self):
+        """Stop the workers once the builds that are running have finished, cancelling the queued ones."""
+        with self._lock:
+            in_flight = list(self._in_flight.values())
+        # Outside the lock, as cancelling a job runs its callback (see _finished), which takes the lock
+        for job in in_flight:
+            job.work.cancel()
+        self._executor.shutdown(wait=True)
+
+
+class BuildServer(ThreadingHTTPServer):
+    """Class for serving a :class:`BuildService` over HTTP.
+
+    The routes are:
+
+    - ``POST /builds``: submit a quiz yaml file, building the outputs given by ``output`` in the query (both by
+      default). With ``wait=<seconds>`` in the query, the response waits for the build to finish (for
+      at most :data:`max_wait` seconds). The response describes the job (see :meth:`Job.to_dict`).
+    - ``GET /builds/<id>``: describe a job
+    - ``GET /builds/<id>/<output>.pdf`` and ``GET /builds/<id>/<output>.log``: the pdf of an output, or the
+      log of a failed compile
+    """
+
+    daemon_threads = True
+
+    def __init__(self, service: BuildService, host: str = "127.0.0.1", port: int = 8090):
+        """Initialize the server (use port 0 to pick any free port)."""
+        super().__init__((host, port), _BuildHandler)
+        self.service = service
+
+
+class _BuildHandler(BaseHTTPRequestHandler):
+    server: BuildServer
+
+    def _send(
+        self, status: int, content_type: str, body: bytes, headers: Optional[Dict[str, str]] = None
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(
+        self, status: int, dct: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ):
+        self._send(status, "application/json", json.dumps(dct).encode(), headers)
+
+    def do_POST(self):  # noqa: N802
+        url = urlsplit(self.path)
+        if url.path != "/builds":
+            self._send_json(404, {"error": "Not found"})
+            return
+        query = parse_qs(url.query)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > max_body:
+            self._send_json(413, {"error": "The quiz is too large"})
+            return
+        try:
+            dct = parse_yaml(self.rfile.read(length).decode("utf-8"))
+        except Exception as e:  # noqa: B902
+            self._send_json(400, {"error": f"Could not parse the quiz: {e}"})
+            return
+        if not isinstance(dct, dict):
+            self._send_json(400, {"error": "The quiz must be a yaml mapping"})
+            return
+        outputs = [
+            o for value in query.get("output", []) for o in value.split(",")
+        ] or valid_outputs
+        unknown = sorted(set(outputs) - set(valid_outputs))
+        if unknown:
+            error = f"Unknown output(s) {', '.join(unknown)}; must be one of {valid_outputs}"
+            self._send_json(400, {"error": error})
+            return
+        try:
+            wait = float(query.get("wait", ["0"])[0] or 0)
+        except ValueError:
+            wait = math.nan
+        if math.isnan(wait):
+            self._send_json(400, {"error": "wait must be a number of seconds"})
+            return
+
+        try:
+            job, duplicate = self.server.service.submit(dct, outputs)
+        except RuntimeError as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "10"})
+            return
+
+        if wait > 0:
+            try:
+                job.future.exception(timeout=min(wait, max_wait))
+            except FutureTimeoutError:
+                pass
+        dct = dict(job.to_dict(), duplicate=duplicate)
+        self._send_json(200 if job.future.done() else 202, dct, {"Location": f"/builds/{job.id}"})
+
+    def do_GET(self):  # noqa: N802
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        job = (
+            self.server.service.get(parts[1])
+            if len(parts) in (2, 3) and parts[0] == "builds"
+            else None
+        )
+        if job is None:
+            self._send_json(404, {"error": "Not found"})
+        elif len(parts) == 2:
+            self._send_json(200, job.to_dict())
+        else:
+            output, _, kind = parts[2].partition(".")
+            path = self.server.service.file(job, output, kind)
+            if path is None:
+                self._send_json(404, {"error": "Not found"})
+            elif kind == "pdf":
+                self._send(200, "application/pdf", path.read_bytes())
+            else:
+                self._send(200, "text/plain; charset=utf-8", path.read_bytes())
+
+    def log_message(self, format, *args):  # noqa: A002
+        # Keep the terminal quiet; clients poll the status of their builds
+        pass
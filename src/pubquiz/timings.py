@@ -0,0 +1,156 @@
+"""Module for recording how long every stage of a build takes.
+
+Timing is opt-in: the stages of a build only report to a :class:`Timings` recorder while one is active, e.g.
+
+.. code-block:: python
+
+    from pubquiz.timings import recording
+
+    with recording() as timings:
+        timings.hooks.append(lambda t: print(t.stage, t.wall))
+        build(quiz, ["sheets", "slides"])
+    print(timings.table())
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Timing:
+    """Class representing the time spent in one stage of a build."""
+
+    stage: str
+    wall: float
+    cpu: float
+    # When the stage started, in seconds since the recording started
+    start: float = 0.0
+
+
+@dataclass
+class Timings:
+    """Class for recording the wall and CPU time of the stages of a build."""
+
+    records: List[Timing] = field(default_factory=list)
+    # Functions that are called with every timing as soon as it is recorded
+    hooks: List[Callable[[Timing], None]] = field(default_factory=list)
+    origin: float = field(default_factory=time.perf_counter)
+
+    def add(self, stage: str, wall: float, cpu: float, start: Optional[float] = None):
+        """Record the time spent in a stage.
+
+        :param stage: the name of the stage
+        :param wall: the wall-clock time spent in the stage, in seconds
+        :param cpu: the CPU time spent in the stage, in seconds
+        :param start: when the stage started (a :func:`time.perf_counter` value; defaults to ``wall`` ago)
+        """
+        start = time.perf_counter() - wall if start is None else start
+        timing = Timing(stage, wall, cpu, start - self.origin)
+        self.records.append(timing)
+        for hook in self.hooks:
+            hook(timing)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the time spent in the body of a ``with`` statement as the stage ``name``."""
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, time.process_time() - cpu, start)
+
+    def table(self) -> str:
+        """Format the timings as a table, in the order in which the stages started.
+
+        Stages that were recorded several times (e.g. resolving paths, which every output does) are added up.
+        """
+        totals: Dict[str, List[float]] = {}
+        for t in sorted(self.records, key=lambda t: t.start):
+            total = totals.setdefault(t.stage, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += t.wall
+            total[2] += t.cpu
+
+        width = max([len("Stage")] + [len(name) for name in totals])
+        lines = [f"{'Stage':<{width}}  {'Calls':>5}  {'Wall (s)':>9}  {'CPU (s)':>9}"]
+        lines += [
+            f"{name:<{width}}  {calls:5.0f}  {wall:9.3f}  {cpu:9.3f}"
+            for name, (calls, wall, cpu) in totals.items()
+        ]
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        """Serialize the timings to JSON, in the order in which the stages started."""
+        records = sorted(self.records, key=lambda t: t.start)
+        return json.dumps({"stages": [asdict(t) for t in records]}, indent=2)
+
+
+_active: Optional[Timings] = None
+
+
+def active() -> Optional[Timings]:
+    """Return the recorder that is currently active, if any."""
+    return _active
+
+
+@contextmanager
+def recording(timings: Optional[Timings] = None) -> Iterator[Timings]:
+    """Activate a recorder for the duration of a ``with`` statement.
+
+    :param timings: the recorder to activate (defaults to a new one)
+
+    :returns: the active recorder
+    """
+    global _active
+    previous, _active = _active, timings or Timings()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the time spent in the body of a ``with`` statement, if a recorder is active."""
+    if _active is None:
+        yield
+    else:
+        with _active.stage(name):
+            yield
+
+
+def timed_iter(name: str, iterable: Iterable[T]) -> Iterator[T]:
+    """Wrap an iterator, recording the time spent generating its items (but not consuming them) as a stage.
+
+    This is how the rendering of every round is timed, even though the LaTeX code is streamed to a file.
+    """
+    timings = _active
+    if timings is None:
+        yield from iterable
+        return
+
+    iterator = iter(iterable)
+    start, wall, cpu = time.perf_counter(), 0.0, 0.0
+    while True:
+        w, c = time.perf_counter(), time.process_time()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            wall += time.perf_counter() - w
+            cpu += time.process_time() - c
+        yield item
+    timings.add(name, wall, cpu, start)
+
+
+def children_cpu_time() -> float:
+    """Return the CPU time used by the finished child processes (such as pdflatex) of this process."""
+    times = os.times()
+    return times.children_user + times.children_system
@@ -0,0 +1,156 @@
+"""Module for checking the files a quiz refers to before compiling it.
+
+A missing or broken picture otherwise only shows up once pdflatex reaches it, possibly minutes into a build and
+with its output hidden. :func:`validate` checks every file the questions and rounds refer to (in parallel, as
+most of the time is spent waiting for the file system) and reports all the problems at once.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from pubquiz.cache import find_file, latex_extensions
+from pubquiz.question import input_regex
+from pubquiz.quiz import Quiz
+
+PathLike = Union[str, Path]
+
+# The first bytes of every kind of picture that pdflatex can include
+magic_numbers = {
+    ".png": b"\x89PNG\r\n\x1a\n",
+    ".jpg": b"\xff\xd8\xff",
+    ".jpeg": b"\xff\xd8\xff",
+    ".pdf": b"%PDF-",
+}
+
+# Custom slides and sheets are either LaTeX code or the name of a file; these look like the latter
+_filename_regex = re.compile(
+    r"^[^\\{}\s]+\.(?:" + "|".join(e[1:] for e in latex_extensions) + r")$"
+)
+
+
+@dataclass
+class Problem:
+    """Class representing a problem with a file that a quiz refers to."""
+
+    # Where the file is referred to, e.g. "round 2 (Music), question 3, question_pic"
+    where: str
+    path: str
+    message: str
+
+    def __str__(self):
+        return f"{self.where}: {self.path} {self.message}"
+
+
+class ValidationError(Exception):
+    """Raised when some of the files a quiz refers to are missing or broken."""
+
+    def __init__(self, problems: List[Problem]):
+        self.problems = problems
+        super().__init__(
+            f"Found {len(problems)} problem(s) with the files the quiz refers to:\n"
+            + "\n".join(f"  {p}" for p in problems)
+        )
+
+
+def references(quiz: Quiz) -> Dict[str, List[str]]:
+    """Collect the files that the rounds and questions of a quiz refer to.
+
+    :returns: every file, along with where it is referred to
+    """
+    quiz.resolve_paths()
+    found: Dict[str, List[str]] = {}
+    for i, r in enumerate(quiz):
+        where = f"round {i + 1} ({r.title})"
+        if r.sheets:
+            found.setdefault(str(r.sheets), []).append(f"{where}, sheets")
+        for j, q in enumerate(r):
+            for attr in ["question_pic", "answer_pic"]:
+                if getattr(q, attr):
+                    found.setdefault(str(getattr(q, attr)), []).append(
+                        f"{where}, question {j + 1}, {attr}"
+                    )
+            for attr in ["question", "answer", "question_slide", "answer_slide"]:
+                value = getattr(q, attr)
+                if not value:
+                    continue
+                value = str(value)
+                files = input_regex.findall(value)
+                # A custom slide that looks like a file name but was not resolved to one is a missing file
+                if not files and attr.endswith("_slide") and _filename_regex.match(value):
+                    files = [value]
+                for f in files:
+                    found.setdefault(f, []).append(f"{where}, question {j + 1}, {attr}")
+    return found
+
+
+def check_file(path: PathLike) -> Optional[str]:
+    """Check that a file exists, can be read and, if it is a picture, can be decoded.
+
+    :returns: what is wrong with the file, or None if nothing is
+    """
+    found = find_file(path)
+    if found is None:
+        return "does not exist"
+    try:
+        with open(found, "rb") as f:
+            head = f.read(16)
+    except OSError as e:
+        return f"cannot be read ({e.strerror})"
+    if not head:
+        return "is empty"
+
+    suffix = found.suffix.lower()
+    magic = magic_numbers.get(suffix)
+    if magic is None:
+        return None
+    if not head.startswith(magic):
+        return f"is not a valid {suffix[1:].upper()} file"
+    if suffix == ".pdf":
+        return None
+
+    try:
+        from PIL import Image
+    except ImportError:
+        # Without Pillow, checking the header is the best we can do
+        return None
+    try:
+        with Image.open(found) as im:
+            im.verify()
+    except Exception as e:  # noqa: B902
+        return f"cannot be decoded ({e})"
+    return None
+
+
+def validate(quiz: Quiz, jobs: Optional[int] = None) -> List[Problem]:
+    """Check all the files that a quiz refers to (see :func:`check_file`).
+
+    :param quiz: the quiz
+    :param jobs: the number of files to check in parallel (defaults to one per file, up to what
+        :class:`ThreadPoolExecutor` would pick)
+
+    :returns: the problems found, grouped by file in the order in which the files first appear in the quiz
+    """
+    found = references(quiz)
+    if not found:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=jobs or min(32, (os.cpu_count() or 1) + 4, len(found))
+    ) as executor:
+        messages = dict(zip(found, executor.map(check_file, found)))
+    return [
+        Problem(where, path, message)
+        for path, message in messages.items()
+        if message is not None
+        for where in found[path]
+    ]
+
+
+def check(quiz: Quiz, jobs: Optional[int] = None):
+    """Check all the files that a quiz refers to, raising a :class:`ValidationError` if anything is wrong."""
+    problems = validate(quiz, jobs)
+    if problems:
+        raise ValidationError(problems)
@@ -0,0 +1,137 @@
+"""Module for watching a quiz and rebuilding it whenever its sources change."""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pubquiz.build import build
+from pubquiz.cache import find_file
+from pubquiz.compile import CompileResult
+from pubquiz.loader import load_yaml
+from pubquiz.quiz import Quiz
+from pubquiz.round import Round
+from pubquiz.validate import ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class CachedRound(Round):
+    """Class representing a round that remembers the LaTeX code it generates.
+
+    The cache is never invalidated, so this is only suitable for rounds that are not modified after they are
+    created, as is the case in :class:`Watcher`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the round."""
+        super().__init__(*args, **kwargs)
+        self._latex: Dict[Tuple, List[str]] = {}
+
+    def _cached(self, key: Tuple, generate: Callable[[], Iterator[str]]) -> List[str]:
+        if key not in self._latex:
+            self._latex[key] = list(generate())
+        return self._latex[key]
+
+    def iter_sheets(self, with_answers=True, index=1) -> Iterator[str]:
+        """Generate (or recall) the LaTeX code for the quiz sheets."""
+        generate = super().iter_sheets
+        yield from self._cached(
+            ("sheets", with_answers, index), lambda: generate(with_answers, index)
+        )
+
+    def iter_slides(self, index=1, overlays=False) -> Iterator[str]:
+        """Generate (or recall) the LaTeX code for the slides."""
+        generate = super().iter_slides
+        yield from self._cached(("slides", index, overlays), lambda: generate(index, overlays))
+
+
+class Watcher:
+    """Class that rebuilds a quiz whenever the yaml file or any of the files it refers to change.
+
+    Rounds whose yaml is unchanged since the last build are reused along with the LaTeX code they generated,
+    so that only the edited rounds are rendered again.
+    """
+
+    def __init__(
+        self,
+        yaml_file: Path,
+        outputs: List[str],
+        jobs: int = 1,
+        interval: float = 0.5,
+        image_dpi: Optional[int] = None,
+        precompile: bool = False,
+    ):
+        """Initialize the watcher."""
+        self.yaml_file = Path(yaml_file)
+        self.outputs = outputs
+        self.jobs = jobs
+        self.image_dpi = image_dpi
+        self.precompile = precompile
+        self.interval = interval
+        self._rounds: Dict[str, CachedRound] = {}
+        self._mtimes: Dict[Path, Optional[int]] = {}
+
+    def load(self) -> Quiz:
+        """Load the quiz, reusing the rounds that have not changed since the last load."""
+        dct = load_yaml(self.yaml_file)
+
+        rounds: List[Round] = []
+        by_key: Dict[str, CachedRound] = {}
+        for round_dct in dct.pop("rounds", []):
+            key = json.dumps(round_dct, sort_keys=True, default=str)
+            if key not in by_key:
+                # Not `or`: a round without questions (e.g. only custom sheets) is empty, and so falsy
+                cached = self._rounds.get(key)
+                by_key[key] = cached if cached is not None else CachedRound.from_dict(round_dct)
+            rounds.append(by_key[key])
+        self._rounds = by_key
+
+        return Quiz(**dct, rounds=rounds)
+
+    def build(self) -> Dict[str, Optional[CompileResult]]:
+        """Rebuild the quiz and start watching the files it refers to."""
+        quiz = self.load()
+        try:
+            return build(
+                quiz,
+                self.outputs,
+                jobs=self.jobs,
+                image_dpi=self.image_dpi,
+                precompile=self.precompile,
+            )
+        finally:
+            # Even if the build failed, so that fixing a missing file triggers the next build
+            files = {self.yaml_file}
+            for o in self.outputs:
+                files.update(find_file(f) or f for f in quiz.referenced_files(o))
+            self._mtimes = self._stat(files)
+
+    @staticmethod
+    def _stat(files) -> Dict[Path, Optional[int]]:
+        mtimes: Dict[Path, Optional[int]] = {}
+        for f in files:
+            try:
+                mtimes[f] = os.stat(f).st_mtime_ns
+            except OSError:
+                mtimes[f] = None
+        return mtimes
+
+    def changed(self) -> bool:
+        """Check whether any of the watched files changed since the last build."""
+        return self._stat(self._mtimes) != self._mtimes
+
+    def run(self, callback: Callable[[Dict[str, Optional[CompileResult]]], None]):
+        """Build the quiz, and then rebuild it every time it changes (until interrupted).
+
+        :param callback: a function that is called with the results of each build
+        """
+        while True:
+            try:
+                callback(self.build())
+            except ValidationError as e:
+                logger.error(str(e))
+            while not self.changed():
+                time.sleep(self.interval)
@@ -0,0 +1,43 @@
+"""Fixtures shared by the tests."""
+
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the caches of the tests out of the user's cache directory."""
+    monkeypatch.setenv("PUBQUIZ_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+FAKE_PDFLATEX = textwrap.dedent(f"""\
+    #!{sys.executable}
+    import sys
+    from pathlib import Path
+
+    outdir = Path([a.split("=", 1)[1] for a in sys.argv if a.startswith("-output-directory=")][0])
+    name = Path(sys.argv[-1]).stem
+    if "-ini" in sys.argv:
+        name = [a.split("=", 1)[1] for a in sys.argv if a.startswith("-jobname=")][0]
+        (outdir / (name + ".fmt")).write_text("fake format")
+    (outdir / (name + ".log")).write_text("fake log")
+    (outdir / (name + ".aux")).write_text("\\\\relax")
+    (outdir / (name + ".pdf")).write_text("fake pdf")
+    """)
+
+
+@pytest.fixture
+def fake_pdflatex(tmp_path, monkeypatch):
+    """Put a fake pdflatex executable on the PATH."""
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    exe = bindir / "pdflatex"
+    exe.write_text(FAKE_PDFLATEX)
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(bindir) + os.pathsep + os.environ["PATH"])
+    return exe
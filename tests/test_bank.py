@@ -0,0 +1,45 @@
+"""Testing the question bank."""
+
+import datetime
+
+import yaml
+
+from pubquiz.bank import QuestionBank
+
+
+def test_import_and_pick(tmp_path):
+    """Test importing questions and assembling a round from those that match a query."""
+    (tmp_path / "pic.png").touch()
+    quiz = {
+        "title": "Old Quiz",
+        "author": "Me",
+        "rounds": [
+            {
+                "title": "Music",
+                "questions": [
+                    {"question": "Q1", "answer": "A1", "question_pic": "pic.png", "tags": ["80s"]},
+                    {"question": "Q2", "answer": "A2", "difficulty": 3},
+                ],
+            },
+            {"title": "Sport", "questions": [{"question": "Q3", "answer": "A3"}]},
+        ],
+    }
+    yaml_file = tmp_path / "old.yaml"
+    yaml_file.write_text(yaml.safe_dump(quiz))
+
+    with QuestionBank(tmp_path / "bank.sqlite") as bank:
+        assert bank.import_yaml(yaml_file, used=False) == 3
+        # Importing the same questions again does not duplicate them
+        bank.import_yaml(yaml_file, used=False)
+        assert len(bank) == 3
+
+        r = bank.round("Pictures", n=10, category="music", pictures=True, tags=["80s"])
+        assert [q.question for q in r] == ["Q1"]
+        assert r[0].question_pic == str(tmp_path / "pic.png")
+        assert bank.find(difficulty=(2, 4)) == bank.find(category="music", pictures=False)
+
+        bank.round("Used", mark_used=True, n=1, category="music")
+        assert len(bank.find(unused=True)) == 2
+        assert bank.find(not_used_since=datetime.date.today()) == bank.find(unused=True)
+        # The least recently used questions come first
+        assert bank.get(bank.find(n=3))[-1].question == "Q1"
@@ -0,0 +1,27 @@
+"""Testing the benchmark suite."""
+
+from pubquiz.benchmark import previous_result, record, run_benchmark, synthetic_quiz
+
+
+def test_synthetic_quiz():
+    """Test that the synthetic quizzes have the requested size and mix of features."""
+    dct = synthetic_quiz(rounds=4, questions=3, pictures=1.0, solve_in_own_time=1.0)
+    assert len(dct["rounds"]) == 4
+    assert all(len(r["questions"]) == 3 for r in dct["rounds"])
+    assert all(r["solve_in_own_time"] and not r["randomize"] for r in dct["rounds"])
+    assert all("question_pic" in q for r in dct["rounds"] for q in r["questions"])
+    assert synthetic_quiz(pictures=0.5, seed=1) == synthetic_quiz(pictures=0.5, seed=1)
+
+
+def test_record(tmp_path):
+    """Test that recorded results can be found again by configuration."""
+    result = run_benchmark(tmp_path / "quiz", rounds=2, questions=2, pictures=0.5, repeat=1)
+    assert {"from_yaml", "to_sheets", "to_slides"} <= set(result.timings)
+
+    path = tmp_path / "benchmarks.jsonl"
+    assert previous_result(result, path) is None
+    record(result, path)
+    assert previous_result(result, path) == result
+
+    other = run_benchmark(tmp_path / "quiz", rounds=3, questions=2, repeat=1)
+    assert previous_result(other, path) is None
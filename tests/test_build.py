@@ -0,0 +1,87 @@
+"""Testing the building of quizzes."""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+from pubquiz import Quiz
+from pubquiz.build import build, build_isolated, build_many, write_latex
+
+example = Path(__file__).parents[1] / "docs/source/example_quiz.yaml"
+
+
+def test_write_latex_matches_to_slides(tmp_path, monkeypatch):
+    """Test that streaming :meth:Quiz.iter_slides() gives the same document as :meth:Quiz.to_slides()."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").touch()
+    quiz = Quiz.from_yaml(example)
+
+    stream = io.BytesIO()
+    write_latex(quiz.iter_slides(), stream)
+
+    assert stream.getvalue().decode() == quiz.to_slides()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_build_is_cached_in_a_new_directory(tmp_path, monkeypatch, fake_pdflatex):
+    """Test that the default templates are part of the cache key of the very first build of a quiz."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").touch()
+
+    first = build(Quiz.from_yaml(example), ["sheets", "slides"])
+    assert all(r is not None and r.ok for r in first.values())
+    assert build(Quiz.from_yaml(example), ["sheets", "slides"]) == {"sheets": None, "slides": None}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_build_many(tmp_path, monkeypatch, fake_pdflatex):
+    """Test that :func:build_many() builds every quiz into its own directory and reports failures."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").touch()
+    season = tmp_path / "season"
+    season.mkdir()
+    (season / "week1.yaml").write_text(example.read_text())
+    (season / "week2.yaml").write_text("title: No author\n")
+
+    good, bad = build_many(
+        sorted(season.glob("*.yaml")), tmp_path / "out", ["sheets", "slides"], jobs=2
+    )
+
+    assert good.ok
+    assert (tmp_path / "out" / "week1" / "slides.pdf").exists()
+    assert sorted(p.name for p in (tmp_path / "out" / "templates").iterdir()) == [
+        "photo.png",
+        "sheets_header.tex",
+        "slides_header.tex",
+        "slides_preamble.tex",
+    ]
+    assert not bad.ok
+    assert "author" in bad.message
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_build_isolated(tmp_path, monkeypatch, fake_pdflatex, cache_dir):
+    """Test that :func:build_isolated() leaves the workspace untouched and shares the templates between builds."""
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    monkeypatch.chdir(workspace)
+    (workspace / "photo.png").touch()
+
+    for name in ["one", "two"]:
+        quiz = Quiz.from_yaml(example)
+        results = build_isolated(quiz, ["sheets", "slides"], tmp_path / "build", name, force=True)
+        assert all(r.ok for r in results.values())
+        assert results["slides"].pdf == (tmp_path / "build" / name / "slides.pdf").resolve()
+        assert (tmp_path / "build" / name / "sheets.pdf").exists()
+
+    assert sorted(p.name for p in workspace.iterdir()) == ["photo.png"]
+    assert not list((tmp_path / "build" / ".scratch").iterdir())
+    (templates,) = (cache_dir / "templates").iterdir()
+    assert sorted(p.name for p in templates.iterdir()) == [
+        "photo.png",
+        "sheets_header.tex",
+        "slides_header.tex",
+        "slides_preamble.tex",
+    ]
@@ -0,0 +1,32 @@
+"""Testing the build cache."""
+
+import os
+
+from pubquiz.cache import BuildCache, build_key, parse_size
+
+
+def test_build_key(tmp_path):
+    """Test that :func:build_key() changes when the LaTeX hash or a referenced file changes."""
+    pic = tmp_path / "pic.png"
+    pic.write_bytes(b"one")
+    key = build_key("latex", [pic])
+
+    assert build_key("latex", [pic]) == key
+    assert build_key("other latex", [pic]) != key
+    pic.write_bytes(b"two")
+    assert build_key("latex", [pic]) != key
+
+
+def test_clean(tmp_path):
+    """Test that :meth:BuildCache.clean() evicts the least recently used pdfs first."""
+    cache = BuildCache(tmp_path / "cache")
+    pdf = tmp_path / "out.pdf"
+    pdf.write_bytes(b"x" * 100)
+    for i, key in enumerate(["old", "new"]):
+        os.utime(cache.put(key, pdf), (i, i))
+
+    assert cache.size() == 200
+    assert cache.clean(max_size=parse_size("150")) == (1, 100)
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+    assert cache.clean() == (1, 100)
@@ -0,0 +1,58 @@
+"""Testing the command line interface."""
+
+import os
+import subprocess
+import sys
+import time
+
+from click.testing import CliRunner
+
+from pubquiz.build import valid_outputs
+from pubquiz.cli import main
+from pubquiz.cli import valid_outputs as cli_outputs
+
+
+def _run(*args):
+    """Run ``python -m pubquiz`` with import timing, returning the time taken and the modules imported."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "pubquiz", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    duration = time.perf_counter() - start
+    modules = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    return duration, modules
+
+
+def test_version_is_fast():
+    """Test that ``pubquiz --version`` stays within its import and time budget."""
+    duration, modules = _run("--version")
+    assert "click" in modules
+    assert not {"yaml", "pubquiz.quiz", "pubquiz.build", "pubquiz.watch"} & modules
+    assert duration < 2.0
+
+
+def test_help_is_lazy():
+    """Test that ``pubquiz make --help`` does not load the quiz machinery."""
+    _, modules = _run("make", "--help")
+    assert not {"yaml", "pubquiz.quiz", "pubquiz.build"} & modules
+
+
+def test_valid_outputs():
+    """Test that the outputs offered by the CLI are those that can be built."""
+    assert cli_outputs == valid_outputs
+
+
+def test_bad_size():
+    """Test that a size that cannot be parsed is reported as a usage error rather than a traceback."""
+    result = CliRunner().invoke(main, ["cache", "clean", "--max-size", "lots"])
+    assert result.exit_code == 2
+    assert "not a size" in result.output
@@ -0,0 +1,53 @@
+"""Testing the compilation of LaTeX files."""
+
+import sys
+
+import pytest
+
+from pubquiz.compile import compile_all, precompile_header
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_compile_all_parallel(tmp_path, fake_pdflatex):
+    """Test that :func:compile_all() compiles each file in its own directory."""
+    tex_files = [tmp_path / "sheets.tex", tmp_path / "slides.tex"]
+    for f in tex_files:
+        f.write_text(r"\begin{document}\end{document}")
+
+    results = compile_all(tex_files, jobs=2)
+
+    assert [r.name for r in results] == ["sheets", "slides"]
+    for r in results:
+        assert r.ok
+        assert r.pdf == tmp_path / f"{r.name}.pdf"
+        assert r.pdf.exists()
+        assert r.log.parent == tmp_path / ".pubquiz" / r.name
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_compile_fixed_point(tmp_path, fake_pdflatex):
+    """Test that pdflatex is only rerun until the auxiliary files stop changing."""
+    tex_file = tmp_path / "slides.tex"
+    tex_file.write_text(r"\begin{document}\end{document}")
+
+    # The first compile creates the aux file, so it needs a second pass to confirm it is stable
+    [result] = compile_all([tex_file])
+    assert len(result.passes) == 2
+
+    # Later compiles start from the stable aux file
+    [result] = compile_all([tex_file])
+    assert len(result.passes) == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_precompile_header(tmp_path, fake_pdflatex):
+    """Test that the format of a header is only dumped again when the header changes."""
+    header = tmp_path / "sheets_header.tex"
+    header.write_text(r"\documentclass{article}")
+
+    fmt = precompile_header("sheets_header", tmp_path)
+    assert fmt.name == "sheets_header.fmt"
+    assert precompile_header("sheets_header", tmp_path) == fmt
+
+    header.write_text(r"\documentclass{report}")
+    assert precompile_header("sheets_header", tmp_path) != fmt
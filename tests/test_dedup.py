@@ -0,0 +1,43 @@
+"""Testing the detection of near-duplicate questions."""
+
+import pytest
+
+from pubquiz import dedup
+from pubquiz.bank import QuestionBank
+from pubquiz.question import Question
+
+
+def test_signatures():
+    """Test that reworded questions are similar and different questions are not."""
+    sig = dedup.signature("Which planet is the largest in the Solar System?", "Jupiter")
+    reworded = dedup.signature(
+        "What is the \\textbf{largest} planet in our solar system?", "Jupiter"
+    )
+    other = dedup.signature("Who wrote Hamlet?", "Shakespeare")
+    assert dedup.similarity(sig, reworded) >= 0.5
+    assert dedup.similarity(sig, other) < 0.1
+    assert dedup.similarities(sig, [dedup.pack(reworded), dedup.pack(other)]) == [
+        dedup.similarity(sig, reworded),
+        dedup.similarity(sig, other),
+    ]
+
+
+def test_numpy_matches_pure_python(monkeypatch):
+    """Test that the signatures do not depend on whether numpy is installed."""
+    pytest.importorskip("numpy")
+    sig = dedup.signature("Which planet is the largest?", "Jupiter")
+    monkeypatch.setattr(dedup, "np", None)
+    assert dedup.signature("Which planet is the largest?", "Jupiter") == sig
+
+
+def test_bank_duplicates(tmp_path):
+    """Test finding the questions of a new quiz that are already in the bank."""
+    with QuestionBank(tmp_path / "bank.sqlite") as bank:
+        bank.add(Question("Which planet is the largest in the Solar System?", "Jupiter"))
+        bank.add(Question("Who wrote Hamlet?", "Shakespeare"))
+        new = [Question("What's the largest planet in the solar system?", "Jupiter")]
+        new += [Question("Who painted the Mona Lisa?", "Leonardo da Vinci")]
+
+        (duplicate,) = bank.duplicates(new)
+        assert duplicate.question is new[0]
+        assert duplicate.match.answer == "Jupiter"
@@ -0,0 +1,125 @@
+"""Testing the grading of typed answers."""
+
+import io
+
+import pytest
+
+from pubquiz.grading import AnswerKey, edit_distance, grade, normalize_answer, variant_index
+from pubquiz.quiz import Quiz
+
+
+def test_normalize_answer():
+    """Test that case, accents, punctuation, LaTeX and leading articles are ignored."""
+    assert normalize_answer(r"The \textit{Beyoncé}!") == "beyonce"
+    assert normalize_answer("  AC/DC ") == "acdc"
+
+
+def test_edit_distance():
+    """Test the bounded edit distance against some known distances."""
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 2) == 3
+    assert edit_distance("flaw", "lawn", 2) == 2
+    assert edit_distance("", "abc", 5) == 3
+    assert edit_distance("same", "same", 0) == 0
+
+
+def test_answer_key():
+    """Test matching answers with typos and alternates, but not with different numbers."""
+    key = AnswerKey(["Leonardo da Vinci", "da Vinci", "1969"])
+    assert key.match("leonardo da vinchi") == "Leonardo da Vinci"
+    assert key.match("Da Vinci") == "da Vinci"
+    assert key.match("Michelangelo") is None
+    assert key.match("1968") is None
+    assert key.match("leonardo da vinchi", max_distance=0) is None
+
+
+def test_variant_index():
+    """Test reading the labels of the variants, as printed on the sheets."""
+    assert [variant_index(label) for label in ["", "A", "b", "Z", "AA", "3"]] == [
+        None,
+        0,
+        1,
+        25,
+        26,
+        2,
+    ]
+    with pytest.raises(ValueError):
+        variant_index("A1")
+
+
+def test_grade():
+    """Test grading a stream of answers into the scores of every team in every round."""
+    quiz = Quiz.from_dict(
+        {
+            "title": "Grading",
+            "author": "Me",
+            "rounds": [
+                {
+                    "title": "One",
+                    "questions": [{"question": "Q", "answer": "Paris", "alternates": ["Lutetia"]}],
+                },
+                {
+                    "title": "Two",
+                    "questions": [
+                        {"question": "Q", "answer": "Nile"},
+                        {"question": "Q", "answer": "7"},
+                    ],
+                },
+            ],
+        }
+    )
+    submissions = [
+        {"team": "A", "round": "1", "question": "1", "answer": "lutetia"},
+        {"team": "A", "round": "Two", "question": "2", "answer": "7"},
+        {"team": "B", "round": "2", "question": "1", "answer": "the nile"},
+        {"team": "B", "round": "2", "question": "2", "answer": "8"},
+    ]
+    f = io.StringIO()
+    grade(quiz, submissions).write_csv(f)
+    assert f.getvalue().splitlines() == ["team,One,Two,total", "A,1,1,2", "B,0,1,1"]
+
+    with pytest.raises(ValueError, match="Submission 1: There is no question '3'"):
+        grade(quiz, [{"team": "A", "round": "1", "question": "3", "answer": "x"}])
+
+
+def test_grade_variants():
+    """Test that only the rounds solved in the teams' own time are in another order for other variants."""
+    questions = [{"question": f"Q{i}", "answer": f"Answer {i}"} for i in range(6)]
+    rounds = [
+        {"title": "Read out", "randomize": True, "questions": questions},
+        {"title": "Sheet", "randomize": True, "solve_in_own_time": True, "questions": questions},
+    ]
+    quiz = Quiz.from_dict({"title": "T", "author": "A", "seed": 1, "variants": 2, "rounds": rounds})
+    sheets = [q.answer for q in quiz.variant(1)[1]]
+    assert sheets != [q.answer for q in quiz[1]]
+
+    # The team heard the read-out round in the order of the slides, and had the other one on sheet B
+    orders = [[q.answer for q in quiz[0]], sheets]
+    submissions = [
+        {"team": "B", "variant": "B", "round": str(r + 1), "question": str(i + 1), "answer": answer}
+        for r, order in enumerate(orders)
+        for i, answer in enumerate(order)
+    ]
+    f = io.StringIO()
+    grade(quiz, submissions).write_csv(f)
+    assert f.getvalue().splitlines() == ["team,Read out,Sheet,total", "B,6,6,12"]
+
+
+def test_grade_answer_in_file(tmp_path, monkeypatch):
+    """Test that an answer kept in a file is compared with the contents of the file, not its name."""
+    (tmp_path / "answer.tex").write_text(r"\textbf{Mount Everest}" + "\n")
+    quiz = Quiz.from_dict(
+        {
+            "title": "T",
+            "author": "A",
+            "rounds": [{"title": "R", "questions": [{"question": "Q", "answer": "answer.tex"}]}],
+        }
+    )
+    submissions = [
+        {"team": "A", "round": "1", "question": "1", "answer": "mount everest"},
+        {"team": "B", "round": "1", "question": "1", "answer": "answer.tex"},
+    ]
+    monkeypatch.chdir(tmp_path)
+    f = io.StringIO()
+    grade(quiz, submissions).write_csv(f)
+    assert f.getvalue().splitlines() == ["team,R,total", "A,1,1", "B,0,0"]
@@ -0,0 +1,52 @@
+"""Testing the downsampling of pictures."""
+
+from pathlib import Path
+
+import pytest
+
+from pubquiz.images import images_dir, prepare_image, prepare_images
+from pubquiz.question import Question
+from pubquiz.quiz import Quiz
+from pubquiz.round import Round
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_prepare_image(tmp_path):
+    """Test that :func:prepare_image() downsamples large pictures once and leaves small ones alone."""
+    big = tmp_path / "big.jpg"
+    Image.new("RGB", (4000, 3000), "red").save(big)
+
+    prepared = prepare_image(big, height=0.5, dpi=100)
+
+    assert prepared.parent == images_dir()
+    with Image.open(prepared) as im:
+        assert im.size == (237, 178)
+    assert prepare_image(big, height=0.5, dpi=100) == prepared
+    assert prepare_image(prepared, height=0.5, dpi=100) == prepared
+
+
+def test_prepare_small_image(tmp_path, monkeypatch):
+    """Test that :func:prepare_image() remembers that a picture is small enough, rather than decoding it again."""
+    small = tmp_path / "small.png"
+    Image.new("RGB", (40, 30), "red").save(small)
+
+    assert prepare_image(small, height=0.5, dpi=100) == small
+    monkeypatch.setattr(Image, "open", None)
+    assert prepare_image(small, height=0.5, dpi=100) == small
+
+
+def test_prepare_images(tmp_path, monkeypatch):
+    """Test that :func:prepare_images() returns a copy of the quiz, which still refers to the original pictures."""
+    monkeypatch.chdir(tmp_path)
+    Image.new("RGB", (4000, 3000), "red").save(tmp_path / "big.jpg")
+    pictures = Round("Pictures", questions=[Question("Who?", "Me", question_pic=Path("big.jpg"))])
+    words = Round("Words", questions=[Question("What?", "This")])
+    quiz = Quiz("Quiz", "Me", rounds=[pictures, words])
+
+    prepared = prepare_images(quiz, dpi=100)
+
+    assert Path(prepared[0][0].question_pic).parent == images_dir()
+    assert prepared[1] is words
+    assert quiz[0][0].question_pic == Path("big.jpg")
+    assert Path("big.jpg") in quiz.referenced_files("slides")
@@ -0,0 +1,25 @@
+"""Testing the loading of yaml files."""
+
+import os
+
+from pubquiz.loader import load_yaml
+
+
+def test_load_yaml_cache(tmp_path, cache_dir):
+    """Test that :func:load_yaml() reuses the cache until the file changes."""
+    yaml_file = tmp_path / "quiz.yaml"
+    yaml_file.write_text("title: First\nauthor: Me\n")
+
+    assert load_yaml(yaml_file)["title"] == "First"
+    assert len(list((cache_dir / "quizzes").iterdir())) == 1
+
+    # Fake a cache hit by editing the cached entry's source without changing its mtime or size
+    stat = yaml_file.stat()
+    yaml_file.write_text("title: Other\nauthor: Me\n")
+    os.utime(yaml_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_yaml(yaml_file)["title"] == "First"
+    assert load_yaml(yaml_file, use_cache=False)["title"] == "Other"
+
+    # Changing the file invalidates the cache
+    yaml_file.write_text("title: Changed\nauthor: Me\n")
+    assert load_yaml(yaml_file)["title"] == "Changed"
@@ -0,0 +1,24 @@
+"""Testing the lazy resolution of references to files."""
+
+from pathlib import Path
+
+from pubquiz.paths import DirectoryCache
+from pubquiz.question import Question
+
+
+def test_resolve_paths(tmp_path, monkeypatch):
+    """Test that :meth:Question.resolve_paths() only inputs existing files, listing each directory once."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "answers").mkdir()
+    (tmp_path / "answers" / "long.tex").write_text("A long answer")
+
+    questions = [Question(question=f"Question {i}?", answer="answers/long.tex") for i in range(10)]
+    assert questions[0].answer == "answers/long.tex"
+
+    directories = DirectoryCache()
+    for q in questions:
+        q.resolve_paths(directories)
+
+    assert questions[0].question == "Question 0?"
+    assert questions[0].answer == r"\input{answers/long.tex}"
+    assert set(directories._listings) == {Path("."), Path("answers")}
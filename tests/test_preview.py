@@ -0,0 +1,71 @@
+"""Testing the HTML preview."""
+
+import copy
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+import yaml
+
+from pubquiz.benchmark import _picture
+from pubquiz.preview import PreviewServer, latex_to_html, to_html
+from pubquiz.quiz import Quiz
+
+quiz_dct = {
+    "title": "Preview",
+    "author": "Me",
+    "rounds": [
+        {
+            "title": "Pictures",
+            "questions": [
+                {"question": r"Who is \textit{this}?", "answer": "Me", "question_pic": "photo.png"}
+            ],
+        }
+    ],
+}
+
+
+def test_latex_to_html():
+    """Test that common LaTeX markup is translated, and that HTML is escaped."""
+    assert (
+        latex_to_html(r"\textit{a} \textbf{b} -- c \& <d>")
+        == "<i>a</i> <b>b</b> &ndash; c &amp; &lt;d&gt;"
+    )
+
+
+def test_to_html(tmp_path, monkeypatch):
+    """Test that the HTML deck has the questions and answers, and embeds the pictures."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").write_bytes(_picture)
+    html_text = to_html(Quiz.from_dict(copy.deepcopy(quiz_dct)))
+
+    assert "Who is <i>this</i>?" in html_text
+    assert '<p class="answer" data-step="1">Me</p>' in html_text
+    assert 'src="data:image/png;base64,' in html_text
+
+
+def test_server(tmp_path):
+    """Test that the server serves the preview and the pictures of the quiz, but no other files."""
+    (tmp_path / "photo.png").write_bytes(_picture)
+    (tmp_path / "secret.txt").write_text("secret")
+    yaml_file = tmp_path / "quiz.yaml"
+    yaml_file.write_text(yaml.safe_dump(quiz_dct))
+
+    server = PreviewServer(yaml_file, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        html_text = urllib.request.urlopen(url + "/").read().decode()
+        assert f'src="/files{(tmp_path / "photo.png").resolve().as_posix()}"' in html_text
+        assert (
+            urllib.request.urlopen(
+                url + "/files" + (tmp_path / "photo.png").resolve().as_posix()
+            ).read()
+            == _picture
+        )
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/files" + (tmp_path / "secret.txt").resolve().as_posix())
+    finally:
+        server.shutdown()
+        server.server_close()
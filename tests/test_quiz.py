@@ -1,10 +1,92 @@
 """Testing the Quiz class."""
 
+import copy
 from pathlib import Path
 
 from pubquiz import Quiz
+from pubquiz.question import Question
+from pubquiz.quiz import input_header
 
 
 def test_from_yaml():
     """Test the :classmethod:Quiz.from_yaml() classmethod."""
     Quiz.from_yaml(Path(__file__).parents[1] / "docs/source/example_quiz.yaml")
+
+
+def test_to_slides_parts(tmp_path, monkeypatch):
+    """Test that :meth:Quiz.to_slides_parts() gives a title part plus one standalone document per round."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").touch()
+    quiz = Quiz.from_yaml(Path(__file__).parents[1] / "docs/source/example_quiz.yaml")
+
+    parts = quiz.to_slides_parts()
+
+    assert len(parts) == len(quiz) + 1
+    assert r"\titlepage" in parts[0]
+    for i, part in enumerate(parts[1:]):
+        assert part.startswith(input_header("slides_header"))
+        assert part.endswith(r"\end{document}")
+        assert f"Round {i + 1}: {quiz[i].title}" in part
+
+
+def test_overlay_slides():
+    r"""Test that in overlay mode every question is written once and revealed again with \againframe."""
+    quiz = Quiz.from_yaml(Path(__file__).parents[1] / "docs/source/example_quiz.yaml")
+    r = quiz[0]
+
+    normal = "\n".join(r.to_slides(index=1))
+    overlays = "\n".join(r.to_slides(index=1, overlays=True))
+
+    # The round header, the answers header, and the questions (once with overlays, twice without)
+    assert normal.count(r"\begin{frame}") == 2 + 2 * len(r)
+    assert overlays.count(r"\begin{frame}") == 2 + len(r)
+    assert overlays.count(r"\againframe<1->{pubquiz-r1q") == len(r)
+
+
+def test_questions_are_compact():
+    """Test that questions have no ``__dict__`` and share repeated values."""
+    dcts = [
+        {"question": "Q", "answer": "A", "question_pic_credit": "".join(["Wiki", "media"])}
+        for _ in range(2)
+    ]
+    q1, q2 = (Question.from_dict(dct) for dct in dcts)
+    assert not hasattr(q1, "__dict__")
+    assert q1 == q2
+    assert q1.question_pic_credit is q2.question_pic_credit
+
+
+def test_variants(tmp_path, monkeypatch):
+    """Test that the variants of the sheets are reproducible and go into a single document."""
+    monkeypatch.chdir(tmp_path)
+    questions = [{"question": f"Q{i}", "answer": f"A{i}"} for i in range(8)]
+    dct = {"title": "T", "author": "A", "seed": 3, "variants": 3}
+    dct["rounds"] = [
+        {"title": "R", "randomize": True, "solve_in_own_time": True, "questions": questions},
+        {"title": "Read out", "randomize": True, "questions": copy.deepcopy(questions)},
+    ]
+
+    quiz = Quiz.from_dict(copy.deepcopy(dct))
+    orders = [[q.question for q in quiz.variant(v)[0]] for v in range(3)]
+    assert len({tuple(order) for order in orders}) == 3
+    # The first variant is in the same order as the slides
+    assert orders[0] == [q.question for q in quiz[0]]
+    # Rounds that are read out from the slides are in the same order in every variant
+    assert all(quiz.variant(v)[1] is quiz[1] for v in range(3))
+
+    sheets = quiz.to_sheets()
+    assert sheets.count(r"\begin{document}") == 1
+    assert sheets.count("Variant") == 3
+    assert Quiz.from_dict(copy.deepcopy(dct)).to_sheets() == sheets
+
+
+def test_seed_variants():
+    """Test that a quiz with several variants but no seed gets one, so that the first variant matches the slides."""
+    questions = [{"question": f"Q{i}", "answer": f"A{i}"} for i in range(8)]
+    rounds = [{"title": "R", "randomize": True, "solve_in_own_time": True, "questions": questions}]
+    quiz = Quiz.from_dict({"title": "T", "author": "A", "variants": 2, "rounds": rounds})
+
+    seed = quiz.seed_variants()
+
+    assert seed is not None and quiz.seed == seed
+    assert [q.question for q in quiz.variant(0)[0]] == [q.question for q in quiz[0]]
+    assert quiz.seed_variants() is None
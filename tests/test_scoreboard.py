@@ -0,0 +1,77 @@
+"""Testing the scoreboard."""
+
+import asyncio
+import json
+
+import pytest
+
+from pubquiz.scoreboard import Scoreboard, ScoreboardServer
+
+
+def test_scoreboard():
+    """Test that totals are kept up to date, and that teams with the same total share their rank."""
+    scoreboard = Scoreboard(["One", "Two"], teams=["C"])
+    scoreboard.submit("A", 1, 3)
+    scoreboard.submit("B", "Two", 5)
+    assert scoreboard.submit("A", 2, 2.5) == 5.5
+    assert scoreboard.submit("A", 2, 2) == 5
+    assert scoreboard.submit("A", 1, None) == 2
+
+    assert [(t["rank"], t["team"], t["total"]) for t in scoreboard.leaderboard()] == [
+        (1, "B", 5),
+        (2, "A", 2),
+        (3, "C", 0),
+    ]
+    scoreboard.submit("C", 1, 2)
+    assert [t["rank"] for t in scoreboard.leaderboard()] == [1, 2, 2]
+
+    for round_key, score in [(3, 1), ("Three", 1), (1, "many"), (1, float("nan"))]:
+        with pytest.raises(ValueError):
+            scoreboard.submit("A", round_key, score)
+
+
+async def _request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status, _, body = response.partition(b"\r\n\r\n")
+    return int(status.split()[1]), body
+
+
+def test_server(tmp_path):
+    """Test submitting scores to the server, and that the event stream and the log file follow them."""
+    log_file = tmp_path / "scores.jsonl"
+
+    async def run():
+        server = ScoreboardServer(Scoreboard(["One", "Two"]), log_file=log_file)
+        tcp_server = await server.start(port=0)
+        port = tcp_server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /events HTTP/1.1\r\n\r\n")
+        await reader.readuntil(b"\r\n\r\n")
+        assert json.loads((await reader.readline())[len(b"data: ") :])["teams"] == []
+
+        scores = [{"team": "A", "round": 1, "score": 3}, {"team": "B", "round": 2, "score": 4}]
+        status, body = await _request(port, "POST", "/scores", json.dumps(scores).encode())
+        assert status == 200 and json.loads(body)["totals"] == {"A": 3, "B": 4}
+
+        # A bad score rejects the whole request
+        scores = [{"team": "A", "round": 2, "score": 1}, {"team": "B", "round": 3, "score": 4}]
+        status, body = await _request(port, "POST", "/scores", json.dumps(scores).encode())
+        assert status == 400 and "no round 3" in json.loads(body)["error"]
+
+        await reader.readline()
+        board = json.loads((await reader.readline())[len(b"data: ") :])
+        assert [(t["team"], t["total"]) for t in board["teams"]] == [("B", 4), ("A", 3)]
+        writer.close()
+        tcp_server.close()
+
+    asyncio.run(run())
+    assert len(log_file.read_text().splitlines()) == 2
+    assert ScoreboardServer(Scoreboard(["One", "Two"]), log_file=log_file).scoreboard.totals == {
+        "A": 3,
+        "B": 4,
+    }
@@ -0,0 +1,77 @@
+"""Testing the build service."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+import yaml
+
+from pubquiz.serve import BuildServer, BuildService
+
+example = Path(__file__).parents[1] / "docs/source/example_quiz.yaml"
+
+
+@pytest.fixture
+def service(tmp_path, fake_pdflatex):
+    """Start a build service with one worker, in a directory with the picture the example quiz refers to."""
+    (tmp_path / "photo.png").touch()
+    service = BuildService(tmp_path, tmp_path / "work", workers=1)
+    yield service
+    service.shutdown()
+
+
+def test_submit(service):
+    """Test that identical builds in flight are only run once, and that the pdfs can be found afterwards."""
+    dct = yaml.safe_load(example.read_text())
+    job, duplicate = service.submit(dct, ["slides"])
+    again, again_duplicate = service.submit(dct, ["slides"])
+    assert not duplicate
+    assert again is job and again_duplicate
+
+    job.future.result(timeout=60)
+    assert job.status == "done"
+    assert service.file(job, "slides", "pdf").read_text() == "fake pdf"
+    assert service.file(job, "sheets", "pdf") is None
+
+    # Once the first build has finished, submitting the quiz again builds it again, and with nothing to keep,
+    # the first one is forgotten along with its files (including a scratch directory, as for a failed build)
+    scratch = service.work_dir / ".scratch" / f"{job.id}-failed"
+    scratch.mkdir(parents=True)
+    service.keep = 0
+    assert service.submit(dct, ["slides"])[0] is not job
+    assert service.get(job.id) is None
+    assert not (service.work_dir / job.id).exists() and not scratch.exists()
+
+
+def test_server(service):
+    """Test building a quiz over HTTP, and the errors for bad requests."""
+    server = BuildServer(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = urllib.request.Request(f"{url}/builds?wait=60", data=example.read_bytes())
+        with urllib.request.urlopen(request) as response:
+            job = json.load(response)
+        assert job["status"] == "done"
+        assert sorted(job["outputs"]) == ["sheets", "slides"]
+        with urllib.request.urlopen(url + job["outputs"]["sheets"]["pdf"]) as response:
+            assert response.read() == b"fake pdf"
+
+        for query, data in [
+            ("", b"title: ["),
+            ("?output=answers", example.read_bytes()),
+            ("?wait=abc", example.read_bytes()),
+        ]:
+            request = urllib.request.Request(f"{url}/builds{query}", data=data)
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(request)
+            assert e.value.code == 400
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{url}/builds/unknown")
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
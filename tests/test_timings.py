@@ -0,0 +1,46 @@
+"""Testing the instrumentation of builds."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from pubquiz import Quiz
+from pubquiz.build import build
+from pubquiz.timings import recording, stage
+
+example = Path(__file__).parents[1] / "docs/source/example_quiz.yaml"
+
+
+def test_stages_are_only_recorded_while_active():
+    """Test that stages are recorded (and hooks called) only inside :func:recording()."""
+    with stage("ignored"):
+        pass
+
+    seen = []
+    with recording() as timings:
+        timings.hooks.append(seen.append)
+        with stage("outer"):
+            with stage("inner"):
+                pass
+    with stage("ignored"):
+        pass
+
+    assert [t.stage for t in timings.records] == ["inner", "outer"]
+    assert seen == timings.records
+    assert timings.table().splitlines()[1].startswith("outer")
+    assert [s["stage"] for s in json.loads(timings.to_json())["stages"]] == ["outer", "inner"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake pdflatex is a shell script")
+def test_build_records_rounds_and_passes(tmp_path, monkeypatch, fake_pdflatex):
+    """Test that a build records the rendering of every round and every pdflatex pass."""
+    monkeypatch.chdir(tmp_path)
+    with recording() as timings:
+        quiz = Quiz.from_yaml(example)
+        build(quiz, ["sheets"])
+
+    stages = {t.stage for t in timings.records}
+    assert {"load yaml", "render sheets: round 1", "render sheets: round 2", "compile"} <= stages
+    assert "pdflatex sheets.tex: pass 1" in stages
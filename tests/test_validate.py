@@ -0,0 +1,60 @@
+"""Testing the checks of the files a quiz refers to."""
+
+import pytest
+
+from pubquiz.benchmark import _picture
+from pubquiz.build import build
+from pubquiz.quiz import Quiz
+from pubquiz.validate import ValidationError, check_file, validate
+
+
+def test_check_file(tmp_path, monkeypatch):
+    """Test that missing, empty and broken files are reported, and valid ones are not."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "good.png").write_bytes(_picture)
+    (tmp_path / "empty.png").touch()
+    (tmp_path / "fake.jpg").write_bytes(_picture)
+
+    assert check_file("good.png") is None
+    # LaTeX finds files without their extension
+    assert check_file("good") is None
+    assert check_file("missing.png") == "does not exist"
+    assert check_file("empty.png") == "is empty"
+    assert check_file("fake.jpg") == "is not a valid JPG file"
+
+
+def test_validate(tmp_path, monkeypatch):
+    """Test that all the problems are reported at once, before anything is compiled."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "photo.png").write_bytes(_picture)
+    quiz = Quiz.from_dict(
+        {
+            "title": "Broken",
+            "author": "Me",
+            "rounds": [
+                {
+                    "title": "One",
+                    "questions": [
+                        {
+                            "question": "Q",
+                            "answer": "A",
+                            "question_pic": "photo.png",
+                            "answer_pic": "missing.png",
+                        },
+                        {"question": "Q", "answer": "A", "answer_slide": "slides/answer.tex"},
+                    ],
+                },
+                {"title": "Two", "sheets": "two.tex", "questions": []},
+            ],
+        }
+    )
+    assert [str(p) for p in validate(quiz)] == [
+        "round 1 (One), question 1, answer_pic: missing.png does not exist",
+        "round 1 (One), question 2, answer_slide: slides/answer.tex does not exist",
+        "round 2 (Two), sheets: two.tex does not exist",
+    ]
+
+    with pytest.raises(ValidationError) as e:
+        build(quiz, ["sheets"], directory=tmp_path)
+    assert len(e.value.problems) == 3
+    assert not (tmp_path / "sheets.tex").exists()
@@ -0,0 +1,45 @@
+"""Testing the incremental rebuilding of quizzes."""
+
+from pathlib import Path
+
+import yaml
+
+from pubquiz.watch import Watcher
+
+example = Path(__file__).parents[1] / "docs/source/example_quiz.yaml"
+
+
+def test_load_reuses_unchanged_rounds(tmp_path, monkeypatch):
+    """Test that :meth:Watcher.load() only recreates the rounds that changed."""
+    monkeypatch.chdir(tmp_path)
+    dct = yaml.safe_load(example.read_text())
+    yaml_file = tmp_path / "quiz.yaml"
+    yaml_file.write_text(yaml.dump(dct))
+
+    watcher = Watcher(yaml_file, ["sheets"])
+    first = watcher.load()
+    first.to_sheets()
+
+    dct["rounds"][1]["questions"][0]["answer"] = "Edited"
+    yaml_file.write_text(yaml.dump(dct))
+    second = watcher.load()
+
+    assert second[0] is first[0]
+    assert second[1] is not first[1]
+    assert "Edited" in "\n".join(second[1].to_sheets(with_answers=True))
+
+
+def test_load_keeps_repeated_and_empty_rounds(tmp_path, monkeypatch):
+    """Test that a round identical to an earlier one is kept, and that an empty round is reused."""
+    monkeypatch.chdir(tmp_path)
+    dct = yaml.safe_load(example.read_text())
+    dct["rounds"] = [dct["rounds"][0], dct["rounds"][0], {"title": "Empty", "questions": []}]
+    yaml_file = tmp_path / "quiz.yaml"
+    yaml_file.write_text(yaml.dump(dct))
+
+    watcher = Watcher(yaml_file, ["sheets"])
+    first = watcher.load()
+    second = watcher.load()
+
+    assert [r.title for r in first] == [first[0].title, first[0].title, "Empty"]
+    assert second[2] is first[2]